@@ -0,0 +1,82 @@
+"""Cache hit rate of /getbulkuser on rotating, overlapping sets of usernames.
+
+Replays dashboard-like traffic (random overlapping subsets of a pool of accounts,
+in random order) through fetch_business_discovery against the Graph API stub from
+graph_batch_check.py and a Redis at REDIS_URL. Prints how many usernames were
+served from the per-username cache next to the hit rate the old cache (one entry
+per raw query string) would have had on the same traffic, and fails (exit 1) if
+a cached answer differs from a fresh lookup:
+
+    REDIS_URL=redis://localhost python benchmarks/bulk_cache_check.py --requests 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+async def main(requests, accounts, latency):
+    from graph_batch_check import serve_graph_api
+    calls = []
+    server = serve_graph_api(latency, calls)
+    os.environ['GRAPH_API_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault('USER_ID', '17841400000000000')
+    import business_discovery
+    from database import get_redis
+    from http_client import close_http_client
+
+    redis = await get_redis()
+    pool = [f"user{i}" for i in range(accounts)] + ["missing0"]
+    await redis.delete(*[business_discovery.user_cache_key(username) for username in pool])
+
+    random.seed(25)
+    failures = []
+    requested = 0
+    fetched = 0
+    seen_queries = set()
+    old_hits = 0
+    try:
+        for _ in range(requests):
+            usernames = random.sample(pool, random.randint(3, 12))
+            query = ",".join(usernames)
+            old_hits += query in seen_queries
+            seen_queries.add(query)
+
+            calls.clear()
+            before = await redis.mget(*[business_discovery.user_cache_key(username) for username in usernames])
+            result = await business_discovery.fetch_business_discovery(redis, query)
+            requested += len(usernames)
+            fetched += sum(entry is None or json.loads(entry)["status_code"] != 200 for entry in before)
+
+            if list(result["data"]) != usernames:
+                failures.append(f"{query}: results not in request order")
+            expected = await business_discovery.discover_users(usernames, fields=business_discovery.USER_FIELDS)
+            if result["data"] != expected["data"] or result["status"] != expected["status"] or result["status_code"] != expected["status_code"]:
+                failures.append(f"{query}: cached result differs from a fresh lookup")
+    finally:
+        await redis.delete(*[business_discovery.user_cache_key(username) for username in pool])
+        redis.close()
+        await redis.wait_closed()
+        await close_http_client()
+        server.shutdown()
+
+    print(f"{requests} requests over {len(pool)} accounts, {requested} usernames requested")
+    print(f"per-username cache   {1 - fetched / requested:6.1%} of usernames served from Redis")
+    print(f"per-query cache      {old_hits / requests:6.1%} of requests served from Redis")
+
+    for failure in failures[:10]:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--accounts', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.01, help="seconds the Graph API stub takes per HTTP call")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.requests, args.accounts, args.latency)))
@@ -0,0 +1,122 @@
+"""Check the Graph API batch layer against a local stub of graph.facebook.com.
+
+The stub serves single business_discovery GETs and batch POSTs (up to 50
+sub-requests, like the real endpoint) with a fixed latency per HTTP call.
+Some users do not exist (400) and some batch entries come back null, which the
+client retries on their own. Runs the same lookups batched and unbatched, fails
+(exit 1) unless both give the same per-user results, and prints the number of
+HTTP calls and the time each took:
+
+    python benchmarks/graph_batch_check.py --users 120 --latency 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BATCH_LIMIT = 50
+
+def lookup(path, query):
+    # (code, body) for one business_discovery GET, by username in the fields parameter
+    fields = parse_qs(query)["fields"][0]
+    username = fields[len("business_discovery.username("):fields.index(")")]
+    if username.startswith("missing"):
+        return 400, {"error": {"message": f"Invalid user id {username}", "code": 110}}
+    return 200, {"business_discovery": {"username": username, "followers_count": len(username)}, "id": path.split('/')[-1]}
+
+def serve_graph_api(latency, calls):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            payload = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            calls.append("GET")
+            time.sleep(latency)
+            url = urlsplit(self.path)
+            self.reply(*lookup(url.path, url.query))
+
+        def do_POST(self):
+            calls.append("POST")
+            time.sleep(latency)
+            form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+            batch = json.loads(form["batch"][0])
+            if len(batch) > BATCH_LIMIT:
+                return self.reply(400, {"error": {"message": "Too many requests in batch message. Maximum batch size is 50"}})
+            items = []
+            for request in batch:
+                url = urlsplit('/' + request["relative_url"])
+                if "dropped" in url.query:
+                    items.append(None)
+                    continue
+                code, body = lookup(url.path, url.query)
+                items.append({"code": code, "headers": [], "body": json.dumps(body)})
+            self.reply(200, items)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def timed_lookup(business_discovery, usernames, batched, calls):
+    business_discovery.GRAPH_BATCH_ENABLED = batched
+    calls.clear()
+    start = time.perf_counter()
+    result = await business_discovery.discover_users(usernames)
+    return result, time.perf_counter() - start, calls.count("POST"), calls.count("GET")
+
+async def main(users, latency):
+    calls = []
+    server = serve_graph_api(latency, calls)
+    os.environ['GRAPH_API_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault('USER_ID', '17841400000000000')
+    import business_discovery
+    from http_client import close_http_client
+
+    usernames = [f"user{i}" for i in range(users)]
+    usernames[3::17] = [f"missing{i}" for i in range(len(usernames[3::17]))]
+    usernames[5::23] = [f"dropped{i}" for i in range(len(usernames[5::23]))]
+
+    failures = []
+    try:
+        single, single_time, _, single_gets = await timed_lookup(business_discovery, usernames, False, calls)
+        batched, batched_time, posts, gets = await timed_lookup(business_discovery, usernames, True, calls)
+    finally:
+        await close_http_client()
+        server.shutdown()
+
+    print(f"one call per user  {single_time:6.2f}s  {single_gets} GETs")
+    print(f"batched            {batched_time:6.2f}s  {posts} batch POSTs + {gets} GET retries for dropped entries")
+    print(f"status {batched['status_code']}, {sum(code == 200 for code in batched['status'].values())}/{users} users found")
+
+    if batched["data"] != single["data"] or batched["status"] != single["status"]:
+        failures.append("batched results differ from one call per user")
+    if posts != -(-users // BATCH_LIMIT):
+        failures.append(f"expected {-(-users // BATCH_LIMIT)} batch calls, got {posts}")
+    if gets != len([username for username in usernames if username.startswith("dropped")]):
+        failures.append("dropped batch entries were not retried one by one")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=120)
+    parser.add_argument('--latency', type=float, default=0.2, help="seconds the stub takes per HTTP call")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.users, args.latency)))
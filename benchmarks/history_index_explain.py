@@ -0,0 +1,89 @@
+"""EXPLAIN-based regression check for the snapshot table indexes.
+
+Builds the schema in a scratch Postgres schema, loads 30 days of snapshots for
+the users in the scraped CSVs and fails (exit 1) when the per-day lookups stop
+using the (StatsID, Day) primary keys. Point DB_* at a local Postgres:
+
+    DB_HOST=localhost DB_USER=postgres DB_NAME=postgres python benchmarks/history_index_explain.py
+"""
+import asyncio
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import asyncpg
+import dotenv
+from database import create_insta_table, create_tiktok_tables, create_snapshot_partitions
+from query_data import update_or_insert_instagram_data_from_csv, update_or_insert_tiktok_data_from_csv
+
+dotenv.load_dotenv()
+
+SCHEMA = 'history_index_check'
+DAYS = 30
+
+SNAPSHOT_TABLES = [
+    ("instagram_snapshot", ["Rank", "Followers", "Engagement"]),
+    ("tiktok_snapshot", ["Rank", "Followers", "Likes", "Views", "Comments", "Shares"]),
+]
+
+async def explain(conn, sql, *args):
+    rows = await conn.fetch(f"EXPLAIN {sql}", *args)
+    return "\n".join(row[0] for row in rows)
+
+async def main():
+    connect_args = dict(
+        host=os.getenv('DB_HOST'),
+        port=os.getenv('DB_PORT'),
+        user=os.getenv('DB_USER'),
+        password=os.getenv('DB_PASSWORD'),
+        database=os.getenv('DB_NAME'),
+    )
+    conn = await asyncpg.connect(**connect_args)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};")
+    await conn.close()
+
+    pool = await asyncpg.create_pool(**connect_args, server_settings={'search_path': SCHEMA})
+    failures = []
+    try:
+        await create_insta_table(pool)
+        await create_tiktok_tables(pool)
+        await update_or_insert_instagram_data_from_csv(pool, 'scraped_data_instagram.csv')
+        await update_or_insert_tiktok_data_from_csv(pool, 'scraped_data_tiktok.csv')
+
+        async with pool.acquire() as conn:
+            await create_snapshot_partitions(conn, [table for table, _ in SNAPSHOT_TABLES], months_back=1)
+            for table, columns in SNAPSHOT_TABLES:
+                await conn.execute(f"""
+                INSERT INTO {table} (StatsID, Day, {', '.join(columns)}, RecordedAt)
+                SELECT StatsID, Day - n, {', '.join(columns)}, RecordedAt - n * INTERVAL '1 day'
+                FROM {table}, generate_series(1, {DAYS - 1}) n;
+                ANALYZE {table};
+                """)
+
+            for table, columns in SNAPSHOT_TABLES:
+                plan = await explain(conn, f"""
+                SELECT {', '.join(columns)} FROM {table}
+                WHERE StatsID = $1 AND Day = CURRENT_DATE - 7
+                """, 1)
+                # Partitions carry their own copy of the parent key, {table}_pYYYYMM_pkey
+                index = rf"{table}_(p\d{{6}}_)?pkey"
+                if not re.search(rf"Index (Only )?Scan using {index}", plan) or "Seq Scan" in plan:
+                    failures.append(f"{table}: day lookup does not use {table}_pkey\n{plan}")
+                else:
+                    print(f"ok   {table}")
+    finally:
+        await pool.close()
+        conn = await asyncpg.connect(**connect_args)
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        await conn.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(main()))
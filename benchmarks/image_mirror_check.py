@@ -0,0 +1,134 @@
+"""Run the image mirroring pipeline against a local S3 stand-in.
+
+Serves synthetic avatars with ETags from a local HTTP server with some latency,
+mirrors them twice and fails (exit 1) unless the first run uploads everything
+and the second run neither downloads nor uploads anything. Uses moto's S3 server (pip install "moto[server]")
+unless S3_ENDPOINT_URL points at something else, e.g. a local MinIO:
+
+    python benchmarks/image_mirror_check.py --images 950 --latency 0.05
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import boto3
+from image_mirror import mirror_images
+from http_client import close_http_client
+
+BUCKET = 'image-mirror-check'
+
+def image_body(image_id, version):
+    return f"\xff\xd8 avatar {image_id} v{version}".encode() * 64
+
+def serve_images(latency, versions, downloads):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            image_id = self.path.strip('/').split('.')[0]
+            body = image_body(image_id, versions.get(image_id, 0))
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            downloads.append(image_id)
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def s3_client():
+    endpoint_url = os.getenv('S3_ENDPOINT_URL')
+    if not endpoint_url:
+        from moto.server import ThreadedMotoServer
+        moto_server = ThreadedMotoServer(port=0)
+        moto_server.start()
+        host, port = moto_server.get_host_and_port()
+        endpoint_url = f"http://{host}:{port}"
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID', 'testing'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY', 'testing'),
+        region_name=os.getenv('AWS_REGION', 'us-east-1'),
+        config=boto3.session.Config(s3={'addressing_style': 'path'})
+    )
+
+async def timed_run(client, image_urls):
+    start = time.perf_counter()
+    counts = await mirror_images(client, BUCKET, image_urls)
+    return counts, time.perf_counter() - start
+
+async def main(images, latency):
+    versions = {}
+    downloads = []
+    server = serve_images(latency, versions, downloads)
+    client = s3_client()
+    client.create_bucket(Bucket=BUCKET)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    image_urls = {str(image_id): f"{base_url}/{image_id}.jpg" for image_id in range(images)}
+
+    failures = []
+    try:
+        counts, elapsed = await timed_run(client, image_urls)
+        print(f"first run   {elapsed:6.2f}s {counts}")
+        if counts['uploaded'] != images:
+            failures.append("first run did not upload every image")
+
+        downloads.clear()
+        counts, elapsed = await timed_run(client, image_urls)
+        print(f"second run  {elapsed:6.2f}s {counts}, {len(downloads)} downloads")
+        if counts['uploaded'] != 0 or counts['unchanged'] != images:
+            failures.append("second run re-uploaded unchanged images")
+        if downloads:
+            failures.append("second run downloaded unchanged images")
+
+        for image_id in list(image_urls)[:5]:
+            versions[image_id] = 1
+        downloads.clear()
+        counts, elapsed = await timed_run(client, image_urls)
+        print(f"5 changed   {elapsed:6.2f}s {counts}, {len(downloads)} downloads")
+        if counts['uploaded'] != 5 or len(downloads) != 5:
+            failures.append("changed images were not re-downloaded and re-uploaded")
+
+        stored = client.get_object(Bucket=BUCKET, Key="0.jpg")['Body'].read()
+        if stored != image_body("0", 1):
+            failures.append("bucket does not hold the changed image")
+
+        # What the old serial loop paid every night: one download and one upload per image
+        start = time.perf_counter()
+        for image_id in list(image_urls)[:50]:
+            client.put_object(Bucket=BUCKET, Key=f"{image_id}.jpg", Body=image_body(image_id, 0), ContentType='image/jpeg')
+            time.sleep(latency)
+        print(f"serial estimate for {images} images: {(time.perf_counter() - start) / 50 * images:6.2f}s")
+    finally:
+        await close_http_client()
+        server.shutdown()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds the image server waits per request")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.images, args.latency)))
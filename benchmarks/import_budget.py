@@ -0,0 +1,87 @@
+"""Cold-start import budget for the API process, measured with python -X importtime.
+
+Imports main in fresh interpreters (from a scratch directory) and fails (exit 1)
+when the median cumulative import time of main goes over the budget, or when
+any of the heavy packages that are meant to load lazily shows up at import:
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --budget 0.9 --runs 7 --top 15
+
+The budget can also come from IMPORT_BUDGET_SECONDS, so CI on slower machines
+can raise it without editing this file.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by the worker or by a few endpoints, importing main must not load them
+DEFERRED_PACKAGES = ['pandas', 'numpy', 'boto3', 'botocore', 'bs4', 'lxml', 'newsdataapi']
+
+IMPORT_BUDGET_SECONDS = float(os.getenv('IMPORT_BUDGET_SECONDS', 1.0))
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+def import_main(cwd):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import sys; sys.path.insert(0, {ROOT!r}); import main"],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import main failed:\n{result.stderr[-2000:]}")
+
+    # module -> cumulative us, and the modules main imports directly. Children are
+    # printed before their parent, two more spaces of indent per level.
+    modules = {}
+    children = []
+    main_imports = {}
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name, cumulative, depth = match.group(4), int(match.group(2)), (len(match.group(3)) - 1) // 2
+        modules[name] = cumulative
+        if depth == 1:
+            children.append((name, cumulative))
+        elif depth == 0:
+            if name == 'main':
+                main_imports = dict(children)
+            children = []
+    return modules, main_imports
+
+def main(runs, budget, top):
+    with tempfile.TemporaryDirectory() as cwd:
+        samples = [import_main(cwd) for _ in range(runs)]
+
+    totals = [modules['main'] / 1e6 for modules, _ in samples]
+    median_total = statistics.median(totals)
+    print(f"import main  median {median_total:.3f}s  min {min(totals):.3f}s  max {max(totals):.3f}s  budget {budget:.3f}s")
+
+    print("\nslowest imports made by main (last run)")
+    slowest = sorted(samples[-1][1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[:top]:
+        print(f"  {name:<24} {cumulative / 1000:8.1f}ms")
+
+    failures = []
+    loaded = sorted({name.split('.')[0] for modules, _ in samples for name in modules} & set(DEFERRED_PACKAGES))
+    if loaded:
+        failures.append(f"import main loaded deferred packages: {', '.join(loaded)}")
+    if median_total > budget:
+        failures.append(f"import main took {median_total:.3f}s, over the {budget:.3f}s budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_SECONDS, help="seconds allowed for import main")
+    parser.add_argument('--top', type=int, default=10, help="how many of the slowest imports to list")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget, args.top))
@@ -0,0 +1,142 @@
+"""Microbenchmark for the hypeauditor leaderboard parser.
+
+Compares the old per-field find() loops on html.parser with leaderboard_parser.
+Pass saved pages with --tiktok/--instagram (globs), otherwise pages are
+synthesised from the scraped_data_*.csv snapshots.
+
+    python benchmarks/leaderboard_parser_bench.py --tiktok 'pages/tiktok-*.html'
+"""
+import argparse
+import csv
+import glob
+import html
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+from leaderboard_parser import parse_tiktok_page, parse_instagram_page
+
+ROWS_PER_PAGE = 50
+
+def legacy_tiktok(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    data = []
+    for row in soup.find_all('div', class_='row tiktok-row'):
+        rank = row.find(class_='row-cell rank').get_text(strip=True) if row.find(class_='row-cell rank') else ''
+        username = row.find(class_='contributor__name-content').get_text(strip=True) if row.find(class_='contributor__name-content') else ''
+        comments = row.find(class_='row-cell comments-avg').get_text(strip=True) if row.find(class_='row-cell comments-avg') else ''
+        followers = row.find(class_='row-cell subscribers').get_text(strip=True) if row.find(class_='row-cell subscribers') else ''
+        views = row.find(class_='row-cell views-avg').get_text(strip=True) if row.find(class_='row-cell views-avg') else ''
+        likes = row.find(class_='row-cell likes-avg').get_text(strip=True) if row.find(class_='row-cell likes-avg') else ''
+        shares = row.find(class_='row-cell shares-avg').get_text(strip=True) if row.find(class_='row-cell shares-avg') else ''
+        img = row.find('img')['src'] if row.find('img') else ''
+        data.append([rank, username, comments, followers, likes, views, shares, img])
+    return data
+
+def legacy_instagram(html_content):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    data = []
+    for row in soup.find_all('div', class_='row'):
+        rank = row.find(class_='row-cell rank').get_text(strip=True) if row.find(class_='row-cell rank') else ''
+        username = row.find(class_='contributor__name-content').get_text(strip=True) if row.find(class_='contributor__name-content') else ''
+        category = row.find(class_='tag__content ellipsis').get_text(strip=True) if row.find(class_='tag__content ellipsis') else ''
+        followers = row.find(class_='row-cell subscribers').get_text(strip=True) if row.find(class_='row-cell subscribers') else ''
+        country = row.find(class_='row-cell audience').get_text(strip=True) if row.find(class_='row-cell audience') else ''
+        engagement = row.find(class_='row-cell engagement').get_text(strip=True) if row.find(class_='row-cell engagement') else ''
+        img = row.find('img')['src'] if row.find('img') else ''
+        data.append([rank, username, category, followers, country, engagement, img])
+    return data
+
+def page_shell(rows_html):
+    # Rough stand-in for the navigation, filters and scripts around the table
+    chrome = ''.join(f'<li class="nav-item"><a href="/link/{i}">Link {i}</a></li>' for i in range(200))
+    script = '<script>' + 'var x = 1;' * 2000 + '</script>'
+    return (
+        f'<html><head><title>Top</title>{script}</head><body><nav><ul>{chrome}</ul></nav>'
+        f'<div class="table"><div class="row row--header"><div class="row-cell">#</div></div>{rows_html}</div>'
+        f'<footer><ul>{chrome}</ul></footer></body></html>'
+    )
+
+def contributor(username, img, extra=''):
+    return (
+        f'<div class="row-cell contributor"><a href="/{username}"><img src="{html.escape(img)}" alt=""></a>'
+        f'<div class="contributor__content"><div class="contributor__name-content">{html.escape(username)}</div>{extra}</div></div>'
+    )
+
+def synthetic_tiktok_pages():
+    with open(os.path.join(ROOT, 'scraped_data_tiktok.csv'), newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    pages = []
+    for start in range(0, len(rows), ROWS_PER_PAGE):
+        rows_html = ''.join(
+            f'<div class="row tiktok-row"><div class="row-cell rank">{r["Rank"]}</div>'
+            + contributor(r['Username'], r['img'])
+            + f'<div class="row-cell subscribers">{r["Followers"]}</div>'
+            f'<div class="row-cell views-avg">{r["Views"]}</div>'
+            f'<div class="row-cell likes-avg">{r["Likes"]}</div>'
+            f'<div class="row-cell comments-avg">{r["Comments"]}</div>'
+            f'<div class="row-cell shares-avg">{r["Shares"]}</div></div>'
+            for r in rows[start:start + ROWS_PER_PAGE]
+        )
+        pages.append(page_shell(rows_html))
+    return pages
+
+def synthetic_instagram_pages():
+    with open(os.path.join(ROOT, 'scraped_data_instagram.csv'), newline='', encoding='utf-8') as file:
+        rows = list(csv.DictReader(file))
+    pages = []
+    for start in range(0, len(rows), ROWS_PER_PAGE):
+        rows_html = ''.join(
+            f'<div class="row"><div class="row-cell rank">{r["Rank"]}</div>'
+            + contributor(r['Username'], r['img'], f'<div class="tag"><div class="tag__content ellipsis">{html.escape(r["Category"])}</div></div>')
+            + f'<div class="row-cell subscribers">{r["Followers"]}</div>'
+            f'<div class="row-cell audience">{html.escape(r["Country"])}</div>'
+            f'<div class="row-cell engagement">{r["Engagement"]}</div></div>'
+            for r in rows[start:start + ROWS_PER_PAGE]
+        )
+        pages.append(page_shell(rows_html))
+    return pages
+
+def load_pages(pattern):
+    pages = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding='utf-8') as file:
+            pages.append(file.read())
+    return pages
+
+def bench(name, parse, pages, repeat):
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = sum(len([r for r in parse(page) if any(f.strip() for f in r)]) for page in pages)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<24} {rows:>6} rows  {best * 1000:>9.1f} ms  {rows / best:>10.0f} rows/sec")
+    return rows / best
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--tiktok', help='glob of saved TikTok leaderboard pages')
+    arg_parser.add_argument('--instagram', help='glob of saved Instagram leaderboard pages')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    tiktok_pages = load_pages(args.tiktok) if args.tiktok else synthetic_tiktok_pages()
+    instagram_pages = load_pages(args.instagram) if args.instagram else synthetic_instagram_pages()
+
+    for label, legacy, parse, pages in [
+        ('tiktok', legacy_tiktok, parse_tiktok_page, tiktok_pages),
+        ('instagram', legacy_instagram, parse_instagram_page, instagram_pages),
+    ]:
+        print(f"{label}: {len(pages)} pages")
+        before = bench('  before (find x2)', legacy, pages, args.repeat)
+        after = bench('  after (single pass)', parse, pages, args.repeat)
+        print(f"  speedup {after / before:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Load time and memory of the location index: parsing the CSVs vs mapping location.idx.
+
+Each mode runs in a fresh process and reports its load time, RSS growth and how
+much of that is private to the process (from /proc/self/smaps_rollup). csv
+builds the in-process dicts and search index the API held before location.idx,
+mmap maps the file and runs a few lookups and searches to fault pages in (the
+load time includes them). With several uvicorn workers the private part is
+paid once per worker, the mapped file only once per machine.
+
+    python benchmarks/location_data_bench.py
+    python benchmarks/location_data_bench.py --workers 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODE = """
+import asyncio, json, sys, time
+sys.path.insert(0, {root!r})
+
+def memory():
+    fields = {{}}
+    with open('/proc/self/smaps_rollup') as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {{"rss": fields["Rss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}}
+
+import location, location_data
+before = memory()
+start = time.perf_counter()
+if {mode!r} == 'csv':
+    city_urls, places = location_data.read_location_csvs(location.LOCATION_DIRECTORY, location.CITY_DATA_FILE)
+    index = location_data.build_search_index(city_urls, places)
+else:
+    location.location_index = location.load_location_index({path!r})
+    index = location.location_index
+    for city in ['bedok-singapore', 'angmokio-singapore', 'outram-singapore']:
+        asyncio.run(location.get_city_url(city))
+    for query in ['bedok', 'ang mo kio', 'changi airprt', 'orchrd road', 'marina bay', 'tampnes']:
+        asyncio.run(location.search_locations(query))
+load = time.perf_counter() - start
+after = memory()
+print(json.dumps({{"load": load, "rss": after["rss"] - before["rss"], "private": after["private"] - before["private"]}}))
+"""
+
+def run_mode(mode, path, workers):
+    code = MODE.format(root=ROOT, mode=mode, path=path)
+    processes = [subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+    results = []
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise SystemExit(f"{mode} run failed")
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def main(workers):
+    sys.path.insert(0, ROOT)
+    from location import LOCATION_DIRECTORY, CITY_DATA_FILE
+    from location_data import compile_location_data
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'location.idx')
+        compile_location_data(path, LOCATION_DIRECTORY, CITY_DATA_FILE)
+        print(f"location.idx {os.path.getsize(path) / 1e6:.1f} MB, {workers} worker process(es) per mode\n")
+        print(f"{'mode':<6} {'load':>9} {'rss MB':>9} {'private MB':>11}")
+        for mode in ['csv', 'mmap']:
+            results = run_mode(mode, path, workers)
+            load = max(result["load"] for result in results)
+            rss = sum(result["rss"] for result in results) / workers
+            private = sum(result["private"] for result in results) / workers
+            print(f"{mode:<6} {load:>8.3f}s {rss:>9.1f} {private:>11.1f}")
+        print("\nrss and private are per worker, private is what each extra worker adds")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=1, help="processes loading the index at the same time")
+    args = parser.parse_args()
+    main(args.workers)
@@ -0,0 +1,59 @@
+"""Latency of /location_search lookups against the real location/*.csv data.
+
+Loads the location index once, then runs a fixed set of autocomplete-style
+queries: random prefixes of real names, half of them with a letter dropped
+to exercise the fuzzy path.
+
+    python benchmarks/location_search_bench.py --queries 5000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from location import get_location_index, search_locations
+
+def make_queries(keys, count, seed):
+    rng = random.Random(seed)
+    keys = [key for key in keys if key]
+    queries = []
+    for _ in range(count):
+        key = rng.choice(keys)
+        query = key[:rng.randint(1, len(key))]
+        if len(query) > 3 and rng.random() < 0.5:
+            typo = rng.randrange(len(query))
+            query = query[:typo] + query[typo + 1:]
+        queries.append(query)
+    return queries
+
+async def main(count, limit, seed):
+    start = time.perf_counter()
+    index = get_location_index()
+    print(f"index load  {time.perf_counter() - start:.3f}s  "
+          f"{len(index['names'])} names, {len(index['prefix_entries'])} word starts")
+
+    timings = []
+    for query in make_queries(index["keys"], count, seed):
+        start = time.perf_counter()
+        result = await search_locations(query, limit)
+        timings.append(time.perf_counter() - start)
+        assert result["status_code"] == 200, result
+
+    timings.sort()
+    percentile = lambda p: timings[min(len(timings) - 1, int(len(timings) * p))] * 1000
+    print(f"{count} queries  median {statistics.median(timings) * 1000:.3f}ms  "
+          f"p90 {percentile(0.9):.3f}ms  p99 {percentile(0.99):.3f}ms  max {timings[-1] * 1000:.3f}ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(main(args.queries, args.limit, args.seed))
@@ -0,0 +1,139 @@
+"""Run the hypeauditor scrapers against a local fixture server.
+
+Serves saved pages (--tiktok/--instagram globs, one file per page in page
+order) or pages synthesised from the scraped_data_*.csv snapshots, with later
+pages answering sooner so they complete out of order. One page fails with a
+500. Runs tiktok_scrap/instagram_scrap into a queue and a CSV, and fails
+(exit 1) unless the queue gets every row of every good page, the CSV holds them
+in page order and a run where every page fails reports a 500:
+
+    python benchmarks/scrape_fixture_check.py --latency 0.05 --fail-page 7
+"""
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = 19
+
+def serve_pages(leaderboards, latency, failing):
+    # leaderboards: {path: [page html]}, failing: set of (path, page) answered with a 500
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            pages = leaderboards.get(url.path)
+            page = int(parse_qs(url.query).get('p', ['1'])[0])
+            time.sleep(latency * (PAGES - page) / PAGES)
+            if pages is None or (url.path, page) in failing or not 1 <= page <= len(pages):
+                self.send_response(500 if pages is not None else 404)
+                self.end_headers()
+                return
+            body = pages[page - 1].encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def drain(queue):
+    batches = []
+    while True:
+        rows = await queue.get()
+        if rows is None:
+            return batches
+        batches.append(rows)
+
+async def run_scraper(scrape, csv_file_name):
+    queue = asyncio.Queue()
+    result, batches = await asyncio.gather(scrape(queue, csv_file_name=csv_file_name), drain(queue))
+    return result, batches
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return list(csv.DictReader(file))
+
+async def check_leaderboard(name, scrape, parse, headers, pages, fail_page, directory):
+    failures = []
+    expected_pages = [[dict(zip(headers, values)) for values in parse(page)] for page in pages]
+    expected = [row for page, rows in enumerate(expected_pages, 1) if page != fail_page for row in rows]
+
+    csv_file_name = os.path.join(directory, f"{name}.csv")
+    start = time.perf_counter()
+    result, batches = await run_scraper(scrape, csv_file_name)
+    elapsed = time.perf_counter() - start
+    queued = [row for rows in batches for row in rows]
+    page_order = [expected_pages.index(rows) + 1 for rows in batches if rows in expected_pages]
+    print(f"{name:<10} {elapsed:6.2f}s  {len(batches)} pages, {len(queued)} rows queued, completion order {page_order[:6]}...")
+
+    if result.get("status_code") != 200:
+        failures.append(f"{name}: scrape returned {result}")
+    if len(batches) != len(pages) - 1 or len(queued) != len(expected):
+        failures.append(f"{name}: expected {len(pages) - 1} pages and {len(expected)} rows on the queue")
+    if sorted(map(repr, queued)) != sorted(map(repr, expected)):
+        failures.append(f"{name}: queued rows differ from the parsed fixture pages")
+    stored = read_csv(csv_file_name)
+    if stored != [{key: value or '' for key, value in row.items()} for row in expected]:
+        failures.append(f"{name}: CSV rows are not the fixture rows in page order")
+    return failures
+
+async def check_all_failing(name, scrape, directory):
+    csv_file_name = os.path.join(directory, f"{name}-failing.csv")
+    result, batches = await run_scraper(scrape, csv_file_name)
+    print(f"{name:<10} every page failing: {result}")
+    if result.get("status_code") != 500 or batches or os.path.exists(csv_file_name):
+        return [f"{name}: a run with every page failing did not report a 500 cleanly"]
+    return []
+
+async def main(latency, fail_page, tiktok_glob, instagram_glob):
+    from leaderboard_parser_bench import load_pages, synthetic_tiktok_pages, synthetic_instagram_pages
+    from leaderboard_parser import parse_tiktok_page, parse_instagram_page, TIKTOK_HEADERS, INSTAGRAM_HEADERS
+    tiktok_pages = (load_pages(tiktok_glob) if tiktok_glob else synthetic_tiktok_pages())[:PAGES]
+    instagram_pages = (load_pages(instagram_glob) if instagram_glob else synthetic_instagram_pages())[:PAGES]
+
+    leaderboards = {"/top-tiktok-singapore/": tiktok_pages, "/top-instagram-all-singapore/": instagram_pages}
+    failing = {(path, fail_page) for path in leaderboards}
+    server = serve_pages(leaderboards, latency, failing)
+    os.environ['HYPEAUDITOR_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}"
+    import social_scrape
+    from http_client import close_http_client
+
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            failures += await check_leaderboard("tiktok", social_scrape.tiktok_scrap, parse_tiktok_page, TIKTOK_HEADERS, tiktok_pages, fail_page, directory)
+            failures += await check_leaderboard("instagram", social_scrape.instagram_scrap, parse_instagram_page, INSTAGRAM_HEADERS, instagram_pages, fail_page, directory)
+            failing.update((path, page) for path in leaderboards for page in range(1, PAGES + 1))
+            failures += await check_all_failing("tiktok", social_scrape.tiktok_scrap, directory)
+    finally:
+        await close_http_client()
+        server.shutdown()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds the first page takes, later pages answer sooner")
+    parser.add_argument('--fail-page', type=int, default=7, help="page answered with a 500")
+    parser.add_argument('--tiktok', help="glob of saved TikTok leaderboard pages")
+    parser.add_argument('--instagram', help="glob of saved Instagram leaderboard pages")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.latency, args.fail_page, args.tiktok, args.instagram)))
@@ -0,0 +1,54 @@
+"""Time how long it takes a fresh interpreter to import main.py (and database.py).
+
+Each run is a new process, so nothing is cached between runs. Runs from a
+scratch directory to make sure importing does not depend on files in the
+working directory (like the scraped CSVs):
+
+    python benchmarks/startup_time.py --runs 10
+    python benchmarks/startup_time.py --budget 1.5   # exit 1 if main takes longer
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TIMED_IMPORT = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+def time_import(module, cwd):
+    result = subprocess.run(
+        [sys.executable, "-c", TIMED_IMPORT.format(root=ROOT, module=module)],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main(runs, budget):
+    with tempfile.TemporaryDirectory() as cwd:
+        medians = {}
+        for module in ["database", "main"]:
+            timings = [time_import(module, cwd) for _ in range(runs)]
+            medians[module] = statistics.median(timings)
+            print(f"import {module:<9} median {medians[module]:.3f}s  min {min(timings):.3f}s  max {max(timings):.3f}s")
+
+    if budget is not None and medians["main"] > budget:
+        print(f"FAIL import main took {medians['main']:.3f}s, budget is {budget:.3f}s")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, help="seconds allowed for import main")
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.budget))
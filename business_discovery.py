@@ -1,21 +1,43 @@
-import requests
+import asyncio
+import json
 import os
+from urllib.parse import urlencode
 from dotenv import load_dotenv
+from http_client import api_get, api_post
 
 load_dotenv()
 
+# Point this at a local stub to run without Facebook
+GRAPH_API_URL = os.getenv('GRAPH_API_URL', 'https://graph.facebook.com').rstrip('/')
+GRAPH_API_VERSION = 'v3.2'
+# Bulk lookups go out as Graph API batch requests, the platform takes up to 50 per batch
+GRAPH_BATCH_ENABLED = os.getenv('GRAPH_BATCH_ENABLED', '1') == '1'
+GRAPH_BATCH_LIMIT = 50
+# /getuser and /getbulkuser share one cache entry per username
+USER_FIELDS = "website,profile_picture_url,follows_count,followers_count,media_count,media{permalink,like_count,media_url,media_type,caption}"
+USER_CACHE_SECONDS = 600
+
+def discovery_path():
+    return f"{GRAPH_API_VERSION}/{os.getenv('USER_ID')}"
+
+def discovery_fields(username, fields):
+    return f"business_discovery.username({username}){{{fields}}}"
+
+def user_cache_key(username):
+    # Instagram usernames are case-insensitive, Foo and foo share one entry
+    return f"business-discovery-{username.lower()}"
+
 async def business_discovery(username):
     try:
-        user_id = os.getenv("USER_ID")
-        url = f"https://graph.facebook.com/v3.2/{user_id}"
+        url = f"{GRAPH_API_URL}/{discovery_path()}"
 
         params = {
-            "fields": f"business_discovery.username({username}){{website,profile_picture_url,follows_count,followers_count,media_count,media{{permalink,like_count,media_url,media_type,caption}}}}",
+            "fields": discovery_fields(username, USER_FIELDS),
             "access_token": os.getenv("ACCESS_TOKEN"),
         }
 
         # Send the GET request
-        response = requests.get(url, params=params)
+        response = await api_get(url, params=params)
 
         return {
             "status_code": response.status_code,
@@ -27,32 +49,151 @@ async def business_discovery(username):
             "error": str(e)
         }
     
-async def fetch_business_discovery(usernames: str):
+# Bulk lookups fan out concurrently, each Graph API call gets its own timeout so one
+# slow call only costs its own entries
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', 15))
+BULK_ITEM_TIMEOUT = float(os.getenv('BULK_ITEM_TIMEOUT', 10))
+BULK_FIELDS = "followers_count,media_count,media{permalink,like_count,media_url,media_type,caption}"
+
+async def discover_user(username, fields, semaphore):
+    url = f"{GRAPH_API_URL}/{discovery_path()}"
+    params = {
+        "fields": discovery_fields(username, fields),
+        "access_token": os.getenv("ACCESS_TOKEN"),
+    }
+    async with semaphore:
+        try:
+            response = await asyncio.wait_for(api_get(url, params=params), BULK_ITEM_TIMEOUT)
+            body = response.json()
+        except asyncio.TimeoutError:
+            return 504, {"error": f"Timed out after {BULK_ITEM_TIMEOUT}s"}
+        except Exception as e:
+            return 502, {"error": str(e)}
+    if response.status_code == 200:
+        return 200, body
+    return response.status_code, {"error": body}
+
+def batch_item_result(item):
+    # One entry of a batch response: {"code": ..., "headers": [...], "body": "<json>"}
     try:
-        user_id = os.getenv("USER_ID")
-        url = f"https://graph.facebook.com/v3.2/{user_id}"
+        body = json.loads(item["body"])
+    except (TypeError, ValueError):
+        body = item.get("body")
+    if item["code"] == 200:
+        return 200, body
+    return item["code"], {"error": body}
 
-        all_responses = {}
+async def discover_batch(usernames, fields, semaphore):
+    """Look up up to GRAPH_BATCH_LIMIT usernames with one batch call, results in order."""
+    batch = [
+        {"method": "GET", "relative_url": f"{discovery_path()}?{urlencode({'fields': discovery_fields(username, fields)})}"}
+        for username in usernames
+    ]
+    data = {
+        "access_token": os.getenv("ACCESS_TOKEN"),
+        "batch": json.dumps(batch)
+    }
+    async with semaphore:
+        try:
+            response = await asyncio.wait_for(api_post(f"{GRAPH_API_URL}/", data=data), BULK_ITEM_TIMEOUT)
+            items = response.json()
+        except asyncio.TimeoutError:
+            return [(504, {"error": f"Timed out after {BULK_ITEM_TIMEOUT}s"})] * len(usernames)
+        except Exception as e:
+            return [(502, {"error": str(e)})] * len(usernames)
+    if response.status_code != 200 or not isinstance(items, list):
+        return [(response.status_code, {"error": items})] * len(usernames)
 
-        news_list = usernames.split(',')
+    # Facebook answers null for sub-requests it did not get to, those are retried on their own
+    items = items + [None] * (len(usernames) - len(items))
+    retries = [username for username, item in zip(usernames, items) if item is None]
+    retried = dict(zip(retries, await asyncio.gather(*[discover_user(username, fields, semaphore) for username in retries])))
+    return [retried[username] if item is None else batch_item_result(item) for username, item in zip(usernames, items)]
 
-        for news in news_list:
-            params = {
-                "fields": f"business_discovery.username({news}){{followers_count,media_count,media{{permalink,like_count,media_url,media_type,caption}}}}",
-                "access_token": os.getenv("ACCESS_TOKEN"),
-            }
+def bulk_status_code(status):
+    succeeded = sum(status_code == 200 for status_code in status.values())
+    if succeeded == len(status):
+        return 200
+    if succeeded:
+        return 207
+    return 502
+
+async def discover_users(usernames, fields=BULK_FIELDS, concurrency=BULK_CONCURRENCY):
+    """Look up every username, at most concurrency Graph API calls at a time.
+
+    With batching on, several usernames go out as one batch call of up to
+    GRAPH_BATCH_LIMIT sub-requests, otherwise each username is its own call.
+    data has each user's Graph API response (or {"error": ...}) and status each
+    user's status code. The overall status_code is 200 when every lookup
+    succeeded, 207 when only some did and 502 when none did.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    if GRAPH_BATCH_ENABLED and len(usernames) > 1:
+        batches = [usernames[i:i + GRAPH_BATCH_LIMIT] for i in range(0, len(usernames), GRAPH_BATCH_LIMIT)]
+        batch_results = await asyncio.gather(*[discover_batch(batch, fields, semaphore) for batch in batches])
+        results = [result for batch in batch_results for result in batch]
+    else:
+        results = await asyncio.gather(*[discover_user(username, fields, semaphore) for username in usernames])
 
-            # Send the GET request
-            response = requests.get(url, params=params)
+    data = {}
+    status = {}
+    for username, (status_code, body) in zip(usernames, results):
+        data[username] = body
+        status[username] = status_code
 
-            if response.status_code == 200:
-                all_responses[news] = response.json()
+    return {
+        "status_code": bulk_status_code(status),
+        "data": data,
+        "status": status
+    }
+
+def parse_usernames(usernames):
+    # "a, B,,A" -> ["a", "b"]
+    return list(dict.fromkeys(username.strip().lower() for username in usernames.split(',') if username.strip()))
+
+async def fetch_business_discovery(redis, usernames: str):
+    """Look up several usernames, served from the per-username /getuser cache.
+
+    All cache entries are read with one MGET, only the misses and the cached
+    failures go to the Graph API and successful lookups are written back one
+    entry per username. The result does not depend on how the usernames are
+    ordered or grouped, overlapping requests reuse each other's entries.
+    """
+    try:
+        usernames = parse_usernames(usernames)
+        if not usernames:
+            return {
+                "status_code": 400,
+                "error": "no usernames"
+            }
+        cached = await redis.mget(*[user_cache_key(username) for username in usernames])
+
+        data = {}
+        status = {}
+        misses = []
+        for username, entry in zip(usernames, cached):
+            entry = json.loads(entry) if entry else None
+            if entry and entry.get("status_code") == 200:
+                data[username] = entry["data"]
+                status[username] = 200
             else:
-                all_responses[news] = {"error": response.json()}
+                misses.append(username)
+
+        if misses:
+            fetched = await discover_users(misses, fields=USER_FIELDS)
+            data.update(fetched["data"])
+            status.update(fetched["status"])
+            pipe = redis.pipeline()
+            for username in misses:
+                # Failures are not cached, they are retried on the next request
+                if status[username] == 200:
+                    pipe.set(user_cache_key(username), json.dumps({"status_code": 200, "data": data[username]}), expire=USER_CACHE_SECONDS)
+            await pipe.execute()
 
         return {
-            "status_code": response.status_code,
-            "data": all_responses
+            "status_code": bulk_status_code(status),
+            "data": {username: data[username] for username in usernames},
+            "status": {username: status[username] for username in usernames}
         }
     except Exception as e:
         return {
@@ -0,0 +1,25 @@
+"""Compile city_data.csv and location/*.csv into the memory-mapped location index.
+
+The API compiles it on startup when the file is missing or older than the CSVs,
+this builds it ahead of time (the Docker image does it at build time):
+
+    python compile_locations.py
+    python compile_locations.py --output /tmp/location.idx
+"""
+import argparse
+import logging
+import os
+import time
+from location import LOCATION_DATA_FILE, LOCATION_DIRECTORY, CITY_DATA_FILE
+from location_data import compile_location_data
+
+def main(output):
+    start = time.perf_counter()
+    compile_location_data(output, LOCATION_DIRECTORY, CITY_DATA_FILE)
+    logging.info(f"Wrote {output} ({os.path.getsize(output) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s.")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=LOCATION_DATA_FILE, help="where to write the compiled file")
+    main(parser.parse_args().output)
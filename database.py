@@ -5,63 +5,64 @@ import asyncio
 import dotenv
 import os
 import re
-import requests
-import pandas as pd
-import boto3
-from botocore.exceptions import NoCredentialsError, PartialCredentialsError
+from datetime import date, timedelta
+from metrics import sql_metric_expression
+from image_mirror import mirror_images, load_image_manifest
+from sorting import INSTA_SORTING, TIKTOK_SORTING
 
 dotenv.load_dotenv()
 
 redis = None
 mysql_pool = None
+s3_client = None
 
-df = pd.read_csv('scraped_data_instagram.csv')
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis_container:6379')
 
-def extract_image_id(url):
-    match = re.search(r'/(\d+)\.jpg', url)
-    return match.group(1) if match else None
+def get_s3_client():
+    global s3_client
+    if s3_client is None:
+        import boto3
+        s3_client = boto3.client(
+            's3',
+            endpoint_url= os.getenv('S3_ENDPOINT_URL'),
+            aws_access_key_id= os.getenv('AWS_ACCESS_KEY_ID'),
+            aws_secret_access_key= os.getenv('AWS_SECRET_ACCESS_KEY'),
+            region_name= os.getenv('AWS_REGION'),
+            config=boto3.session.Config(s3={'addressing_style': 'path'})
+        )
+    return s3_client
 
-df['image_id'] = df['img'].apply(extract_image_id)
-
-image_urls = dict(zip(df['image_id'].dropna(), df['img'][df['image_id'].notna()]))
-
-client = boto3.client(
-    's3',
-    endpoint_url= os.getenv('S3_ENDPOINT_URL'),
-    aws_access_key_id= os.getenv('AWS_ACCESS_KEY_ID'),
-    aws_secret_access_key= os.getenv('AWS_SECRET_ACCESS_KEY'),
-    region_name= os.getenv('AWS_REGION'),
-    config=boto3.session.Config(s3={'addressing_style': 'path'})
-)
-
-def save_image():
+async def save_image(pg_pool):
+    from botocore.exceptions import NoCredentialsError, PartialCredentialsError
     try:
-        for key, value in image_urls.items():
-            
-            try:
-                response = requests.get(value, stream=True)
-                response.raise_for_status()
-                
-                if 'image' in response.headers['Content-Type'] and int(response.headers.get('Content-Length', 0)) > 0:
-                    client.put_object(
-                        Bucket= os.getenv('BUCKET_NAME'), 
-                        Key=f"{key}.jpg",
-                        Body=response.content,
-                        ContentType=response.headers['Content-Type']
-                    )
-            except requests.exceptions.RequestException as e:
-                print(f"Error downloading image {key}: {e}")
-            except Exception as e:
-                print(f"Error saving image {key}: {e}")
+        image_urls = await load_image_manifest(pg_pool)
+        counts = await mirror_images(get_s3_client(), os.getenv('BUCKET_NAME'), image_urls)
+        if counts["failed"] or not counts["uploaded"] + counts["unchanged"]:
+            return {
+                "status_code": 500,
+                "error": f"Mirrored {counts['uploaded'] + counts['unchanged']} of {len(image_urls)} images, {counts['failed']} failed",
+                "data": counts
+            }
+        return {
+            "status_code": 200,
+            "data": counts
+        }
     except (NoCredentialsError, PartialCredentialsError) as e:
-        print(f"Credentials error: {e}")
+        logging.error(f"Credentials error: {e}")
+        return {
+            "status_code": 500,
+            "error": f"Credentials error: {e}"
+        }
     except Exception as e:
-        print(f"Error: {e}")
-
+        logging.error(f"Error mirroring images: {e}")
+        return {
+            "status_code": 500,
+            "error": str(e)
+        }
 
 async def get_redis():
     return await aioredis.create_redis_pool(
-        'redis://redis_container:6379'
+        REDIS_URL
     )
 
 async def get_mysql_pool():
@@ -89,6 +90,197 @@ async def get_mysql_pool():
             raise Exception("Could not establish a connection to MySQL after multiple attempts.")
     return mysql_pool
 
+create_leaderboard_snapshots_sql = """
+CREATE TABLE IF NOT EXISTS leaderboard_snapshots (
+    Platform VARCHAR(32) PRIMARY KEY,
+    SnapshotDate DATE NOT NULL,
+    TotalCount INT NOT NULL,
+    RefreshedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+INSTAGRAM_SNAPSHOT_TABLES = ["instagram_snapshot"]
+TIKTOK_SNAPSHOT_TABLES = ["tiktok_snapshot"]
+
+# Narrow per-metric tables of older deployments, folded into the snapshot tables
+# by migrate_history_to_snapshots: (table, column, snapshot column, type)
+INSTAGRAM_HISTORY_COLUMNS = [
+    ("followers_insta", "FollowersCount", "Followers", "BIGINT"),
+    ("engagement_history", "EngagementRate", "Engagement", "REAL"),
+    ("rank_insta", "Position", "Rank", "INT")
+]
+TIKTOK_HISTORY_COLUMNS = [
+    ("comments_history", "CommentsCount", "Comments", "BIGINT"),
+    ("followers_tiktok", "FollowersCount", "Followers", "BIGINT"),
+    ("likes_history", "LikesCount", "Likes", "BIGINT"),
+    ("views_history", "ViewsCount", "Views", "BIGINT"),
+    ("shares_history", "SharesCount", "Shares", "BIGINT"),
+    ("rank_tiktok", "Position", "Rank", "INT")
+]
+
+# Snapshot tables are range partitioned by month on Day, one {table}_pYYYYMM per month.
+# Retention is exact to the day: whole expired months are dropped, the month the cutoff
+# falls in loses its expired days with a small DELETE each night.
+SNAPSHOT_RETENTION_DAYS = 30
+PARTITIONS_AHEAD = 1
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+def next_month(month):
+    return month_start(month + timedelta(days=32))
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+def partition_month(table, name):
+    match = re.fullmatch(rf"{table}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+async def is_partitioned(conn, table):
+    return await conn.fetchval("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass($1);", table)
+
+async def create_month_partition(conn, table, month):
+    await conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table}
+    FOR VALUES FROM ('{month}') TO ('{next_month(month)}');
+    """)
+
+async def create_snapshot_partitions(conn, tables, months_back=0, months_ahead=PARTITIONS_AHEAD):
+    # Inserts fail without a partition for their month, so keep the next ones created ahead of time
+    month = month_start(date.today())
+    for _ in range(months_back):
+        month = month_start(month - timedelta(days=1))
+    months = [month]
+    for _ in range(months_back + months_ahead):
+        months.append(next_month(months[-1]))
+
+    for table in tables:
+        if not await is_partitioned(conn, table):
+            continue
+        for month in months:
+            await create_month_partition(conn, table, month)
+
+async def expire_snapshots(conn, tables, retention_days=SNAPSHOT_RETENTION_DAYS):
+    cutoff = date.today() - timedelta(days=retention_days)
+    partitions_sql = """
+    SELECT child.relname FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass($1);
+    """
+
+    for table in tables:
+        for row in await conn.fetch(partitions_sql, table):
+            month = partition_month(table, row['relname'])
+            if month is None or month >= cutoff:
+                continue
+            if next_month(month) <= cutoff:
+                async with conn.transaction():
+                    await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {row['relname']};")
+                    await conn.execute(f"DROP TABLE {row['relname']};")
+                logging.info(f"Dropped expired partition {row['relname']}")
+            else:
+                result = await conn.execute(f"DELETE FROM {row['relname']} WHERE Day < $1;", cutoff)
+                logging.info(f"Deleted {int(result.split()[-1])} expired rows from {row['relname']}")
+
+async def existing_history_columns(conn, history_columns):
+    return [
+        (table, column, snapshot_column, column_type)
+        for table, column, snapshot_column, column_type in history_columns
+        if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL;", table)
+    ]
+
+def history_source_sql(stats_column, history_columns):
+    # One UNION ALL branch per narrow table, each filling only its own snapshot column
+    snapshot_columns = [snapshot_column for _, _, snapshot_column, _ in history_columns]
+    branches = []
+    for table, column, snapshot_column, _ in history_columns:
+        values = [
+            column if other == snapshot_column else f"NULL::{other_type}"
+            for _, _, other, other_type in history_columns
+        ]
+        branches.append(f"""
+        SELECT {stats_column} AS StatsID, RecordedAt, {', '.join(values)} FROM {table}
+        WHERE {stats_column} IS NOT NULL AND RecordedAt IS NOT NULL
+        """)
+    return f"({' UNION ALL '.join(branches)}) history (StatsID, RecordedAt, {', '.join(snapshot_columns)})"
+
+async def migrate_history_table(conn, snapshot_table, stats_column, history_columns):
+    history_columns = await existing_history_columns(conn, history_columns)
+    if not history_columns:
+        return 0
+
+    snapshot_columns = [snapshot_column for _, _, snapshot_column, _ in history_columns]
+    history_sql = history_source_sql(stats_column, history_columns)
+
+    async with conn.transaction():
+        months = await conn.fetch(f"""
+        SELECT DISTINCT date_trunc('month', RecordedAt)::date AS month FROM {history_sql};
+        """)
+        for row in months:
+            await create_month_partition(conn, snapshot_table, row['month'])
+
+        # Same per-day folding the old joins did with MAX(...)
+        result = await conn.execute(f"""
+        INSERT INTO {snapshot_table} (StatsID, Day, {', '.join(snapshot_columns)}, RecordedAt)
+        SELECT StatsID, RecordedAt::date, {', '.join(f"MAX({column})" for column in snapshot_columns)}, MAX(RecordedAt)
+        FROM {history_sql}
+        GROUP BY StatsID, RecordedAt::date
+        ON CONFLICT (StatsID, Day) DO NOTHING;
+        """)
+        await conn.execute(f"ANALYZE {snapshot_table};")
+
+    migrated = int(result.split()[-1])
+    logging.info(f"Migrated {migrated} {snapshot_table} rows from {', '.join(table for table, _, _, _ in history_columns)}")
+    return migrated
+
+async def drop_history_table(conn, snapshot_table, stats_column, history_columns):
+    # Only dropped once every (user, day) of the old tables has its snapshot row
+    history_columns = await existing_history_columns(conn, history_columns)
+    if not history_columns:
+        return
+    tables = ', '.join(table for table, _, _, _ in history_columns)
+
+    async with conn.transaction():
+        missing = await conn.fetchval(f"""
+        SELECT COUNT(*) FROM (
+            SELECT DISTINCT StatsID, RecordedAt::date AS Day FROM {history_source_sql(stats_column, history_columns)}
+        ) days
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {snapshot_table} s WHERE s.StatsID = days.StatsID AND s.Day = days.Day
+        );
+        """)
+        if missing:
+            raise Exception(f"{missing} user days of {tables} have no {snapshot_table} row, not dropping them")
+        await conn.execute(f"DROP TABLE {tables};")
+    logging.info(f"Dropped {tables}")
+
+async def migrate_history_to_snapshots(pg_pool):
+    # Copies only, the old tables stay until drop_history_tables. Run through migrate_snapshots.py.
+    async with pg_pool.acquire() as conn:
+        await migrate_history_table(conn, "instagram_snapshot", "InstagramStatsID", INSTAGRAM_HISTORY_COLUMNS)
+        await migrate_history_table(conn, "tiktok_snapshot", "TikTokStatsID", TIKTOK_HISTORY_COLUMNS)
+
+async def drop_history_tables(pg_pool):
+    async with pg_pool.acquire() as conn:
+        await drop_history_table(conn, "instagram_snapshot", "InstagramStatsID", INSTAGRAM_HISTORY_COLUMNS)
+        await drop_history_table(conn, "tiktok_snapshot", "TikTokStatsID", TIKTOK_HISTORY_COLUMNS)
+
+async def maintain_snapshot_partitions(pg_pool, tables):
+    # Expired months are dropped rather than deleted row by row, no bloat and no long locks
+    try:
+        async with pg_pool.acquire() as conn:
+            await create_snapshot_partitions(conn, tables)
+            await expire_snapshots(conn, tables)
+    except Exception as e:
+        logging.error(f"Failed to maintain partitions for {', '.join(tables)}: {e}")
+
+async def delete_old_insta_data(pg_pool):
+    await maintain_snapshot_partitions(pg_pool, INSTAGRAM_SNAPSHOT_TABLES)
+
+async def delete_old_tiktok_data(pg_pool):
+    await maintain_snapshot_partitions(pg_pool, TIKTOK_SNAPSHOT_TABLES)
+
 async def create_insta_table(mysql_pool):
     create_instagram_stats_sql = """
     CREATE TABLE IF NOT EXISTS instagram_stats (
@@ -100,42 +292,55 @@ async def create_insta_table(mysql_pool):
     );
     """
 
-    create_followers_insta_sql = """
-    CREATE TABLE IF NOT EXISTS followers_insta (
-        ID SERIAL PRIMARY KEY,
-        InstagramStatsID INT,
-        FollowersCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (InstagramStatsID) REFERENCES instagram_stats(ID)
-    );
-    """
-
-    create_engagement_history_sql = """
-    CREATE TABLE IF NOT EXISTS engagement_history (
-        ID SERIAL PRIMARY KEY,
-        InstagramStatsID INT,
-        EngagementRate VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (InstagramStatsID) REFERENCES instagram_stats(ID)
-    );
+    create_instagram_snapshot_sql = """
+    CREATE TABLE IF NOT EXISTS instagram_snapshot (
+        StatsID INT NOT NULL,
+        Day DATE NOT NULL,
+        Rank INT,
+        Followers BIGINT,
+        Engagement REAL,
+        RecordedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (StatsID, Day),
+        FOREIGN KEY (StatsID) REFERENCES instagram_stats(ID)
+    ) PARTITION BY RANGE (Day);
     """
 
-    create_rank_insta_sql = """
-    CREATE TABLE IF NOT EXISTS rank_insta (
-        ID SERIAL PRIMARY KEY,
-        InstagramStatsID INT,
-        Position INT NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (InstagramStatsID) REFERENCES instagram_stats(ID)
+    create_instagram_leaderboard_sql = """
+    CREATE TABLE IF NOT EXISTS instagram_leaderboard_daily (
+        SnapshotDate DATE NOT NULL,
+        ID INT NOT NULL,
+        Username VARCHAR(255) NOT NULL,
+        Category VARCHAR(255),
+        Country VARCHAR(255),
+        ImageURL VARCHAR(255),
+        FollowersToday BIGINT,
+        EngagementToday REAL,
+        RankToday INT,
+        Followers7DaysAgo BIGINT,
+        Engagement7DaysAgo REAL,
+        Rank7DaysAgo INT,
+        Followers14DaysAgo BIGINT,
+        Engagement14DaysAgo REAL,
+        Rank14DaysAgo INT,
+        Followers28DaysAgo BIGINT,
+        Engagement28DaysAgo REAL,
+        Rank28DaysAgo INT,
+        PRIMARY KEY (SnapshotDate, ID)
     );
     """
 
     try:
         async with mysql_pool.acquire() as conn:
             await conn.execute(create_instagram_stats_sql)
-            await conn.execute(create_followers_insta_sql)
-            await conn.execute(create_engagement_history_sql)
-            await conn.execute(create_rank_insta_sql)
+            await conn.execute(create_instagram_snapshot_sql)
+            await create_snapshot_partitions(conn, INSTAGRAM_SNAPSHOT_TABLES)
+            await conn.execute(create_instagram_leaderboard_sql)
+            await conn.execute(create_leaderboard_snapshots_sql)
+            for column in INSTA_SORTING.values():
+                await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS instagram_leaderboard_daily_{column.lower()}_id_idx
+                ON instagram_leaderboard_daily ({column}, ID);
+                """)
             logging.info("Instagram tables created successfully.")
     except Exception as e:
         logging.error(f"Failed to create Instagram tables: {e}")
@@ -149,79 +354,119 @@ async def create_tiktok_tables(pg_pool):
     );
     """
 
-    create_comments_history_sql = """
-    CREATE TABLE IF NOT EXISTS comments_history (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        CommentsCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
-    );
-    """
-
-    create_followers_tiktok_sql = """
-    CREATE TABLE IF NOT EXISTS followers_tiktok (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        FollowersCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
-    );
-    """
-
-    create_likes_history_sql = """
-    CREATE TABLE IF NOT EXISTS likes_history (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        LikesCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
-    );
-    """
-
-    create_views_history_sql = """
-    CREATE TABLE IF NOT EXISTS views_history (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        ViewsCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
-    );
-    """
-
-    create_shares_history_sql = """
-    CREATE TABLE IF NOT EXISTS shares_history (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        SharesCount VARCHAR(255) NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
-    );
+    create_tiktok_snapshot_sql = """
+    CREATE TABLE IF NOT EXISTS tiktok_snapshot (
+        StatsID INT NOT NULL,
+        Day DATE NOT NULL,
+        Rank INT,
+        Followers BIGINT,
+        Likes BIGINT,
+        Views BIGINT,
+        Comments BIGINT,
+        Shares BIGINT,
+        RecordedAt TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (StatsID, Day),
+        FOREIGN KEY (StatsID) REFERENCES tiktok_stats(ID)
+    ) PARTITION BY RANGE (Day);
     """
 
-    create_rank_tiktok_sql = """
-    CREATE TABLE IF NOT EXISTS rank_tiktok (
-        ID SERIAL PRIMARY KEY,
-        TikTokStatsID INT,
-        Position INT NOT NULL,
-        RecordedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (TikTokStatsID) REFERENCES tiktok_stats(ID)
+    create_tiktok_leaderboard_sql = """
+    CREATE TABLE IF NOT EXISTS tiktok_leaderboard_daily (
+        SnapshotDate DATE NOT NULL,
+        ID INT NOT NULL,
+        Username VARCHAR(255) NOT NULL,
+        ImageURL VARCHAR(255),
+        FollowersToday BIGINT,
+        LikesToday BIGINT,
+        ViewsToday BIGINT,
+        CommentsToday BIGINT,
+        SharesToday BIGINT,
+        RankToday INT,
+        Followers7DaysAgo BIGINT,
+        Likes7DaysAgo BIGINT,
+        Views7DaysAgo BIGINT,
+        Comments7DaysAgo BIGINT,
+        Shares7DaysAgo BIGINT,
+        Rank7DaysAgo INT,
+        Followers14DaysAgo BIGINT,
+        Likes14DaysAgo BIGINT,
+        Views14DaysAgo BIGINT,
+        Comments14DaysAgo BIGINT,
+        Shares14DaysAgo BIGINT,
+        Rank14DaysAgo INT,
+        Followers28DaysAgo BIGINT,
+        Likes28DaysAgo BIGINT,
+        Views28DaysAgo BIGINT,
+        Comments28DaysAgo BIGINT,
+        Shares28DaysAgo BIGINT,
+        Rank28DaysAgo INT,
+        PRIMARY KEY (SnapshotDate, ID)
     );
     """
 
     try:
         async with pg_pool.acquire() as conn:
             await conn.execute(create_tiktok_stats_sql)
-            await conn.execute(create_comments_history_sql)
-            await conn.execute(create_followers_tiktok_sql)
-            await conn.execute(create_likes_history_sql)
-            await conn.execute(create_views_history_sql)
-            await conn.execute(create_shares_history_sql)
-            await conn.execute(create_rank_tiktok_sql)
+            await conn.execute(create_tiktok_snapshot_sql)
+            await create_snapshot_partitions(conn, TIKTOK_SNAPSHOT_TABLES)
+            await conn.execute(create_tiktok_leaderboard_sql)
+            await conn.execute(create_leaderboard_snapshots_sql)
+            for column in TIKTOK_SORTING.values():
+                await conn.execute(f"""
+                CREATE INDEX IF NOT EXISTS tiktok_leaderboard_daily_{column.lower()}_id_idx
+                ON tiktok_leaderboard_daily ({column}, ID);
+                """)
             logging.info("TikTok tables created successfully.")
     except Exception as e:
         logging.error(f"Failed to create TikTok tables: {e}")
 
+METRIC_COLUMNS = [
+    ("followers_insta", "FollowersCount", "BIGINT"),
+    ("engagement_history", "EngagementRate", "REAL"),
+    ("comments_history", "CommentsCount", "BIGINT"),
+    ("followers_tiktok", "FollowersCount", "BIGINT"),
+    ("likes_history", "LikesCount", "BIGINT"),
+    ("views_history", "ViewsCount", "BIGINT"),
+    ("shares_history", "SharesCount", "BIGINT")
+]
+
+async def migrate_metric_columns(pg_pool):
+    """Convert the "5.2M" style VARCHAR metrics of older deployments to numbers in place.
+
+    Values that do not parse become NULL, they are logged first. Only run from
+    migrate_snapshots.py, errors are raised so a failed migration stops there.
+    """
+    column_type_sql = """
+    SELECT data_type FROM information_schema.columns
+    WHERE table_name = $1 AND column_name = lower($2);
+    """
+
+    async with pg_pool.acquire() as conn:
+        for table, column, column_type in METRIC_COLUMNS:
+            data_type = await conn.fetchval(column_type_sql, table, column)
+            if data_type != 'character varying':
+                continue
+
+            async with conn.transaction():
+                unparseable = await conn.fetch(f"""
+                SELECT {column} AS value, COUNT(*) AS count FROM {table}
+                WHERE {column} IS NOT NULL AND ({sql_metric_expression(column)}) IS NULL
+                GROUP BY {column} ORDER BY count DESC, {column};
+                """)
+                if unparseable:
+                    logging.warning(
+                        f"{sum(row['count'] for row in unparseable)} {table}.{column} values cannot be parsed and become NULL: "
+                        + ', '.join(f"{row['value']!r} ({row['count']})" for row in unparseable[:20])
+                    )
+
+                await conn.execute(f"""
+                ALTER TABLE {table}
+                {f"ALTER COLUMN {column} DROP NOT NULL," if unparseable else ""}
+                ALTER COLUMN {column} TYPE {column_type}
+                USING ({sql_metric_expression(column)})::{column_type};
+                """)
+                logging.info(f"Converted {table}.{column} to {column_type}")
+
 # async def main():
 #     global redis, mysql_pool
 #     redis = await get_redis()
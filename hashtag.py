@@ -1,6 +1,6 @@
-import requests
 import os
 from dotenv import load_dotenv
+from http_client import api_get
 
 load_dotenv()
 
@@ -14,7 +14,7 @@ async def hashtag(q,top_media):
             "q": q
         }
 
-        response = requests.get(url, params=params)
+        response = await api_get(url, params=params)
 
         has_id = response.json()
 
@@ -32,7 +32,7 @@ async def hashtag(q,top_media):
             "fields" : "permalink,like_count,media_url"
         }
 
-        response = requests.get(url, params=params)
+        response = await api_get(url, params=params)
 
         return {
             "status_code": response.status_code,
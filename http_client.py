@@ -0,0 +1,60 @@
+import asyncio
+import importlib.util
+import logging
+import os
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# One client for every upstream API call the app makes (Graph API, serpapi, newsapi,
+# rapidapi), so connections are kept alive and reused across requests
+API_PER_HOST_CONCURRENCY = int(os.getenv('API_PER_HOST_CONCURRENCY', 20))
+API_REQUEST_TIMEOUT = float(os.getenv('API_REQUEST_TIMEOUT', 15))
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+# httpx only speaks HTTP/2 with the h2 package installed, otherwise it stays on HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+http_client = None
+host_semaphores = {}
+
+def get_http_client():
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(API_REQUEST_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+        )
+        logging.info(f"HTTP client created (HTTP/2 {'enabled' if HTTP2_AVAILABLE else 'unavailable'}).")
+    return http_client
+
+async def close_http_client():
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+    host_semaphores.clear()
+
+def get_host_semaphore(url, limit=API_PER_HOST_CONCURRENCY):
+    # limit only applies when the host's semaphore is created, callers sharing a host share it
+    host = urlsplit(url).netloc
+    semaphore = host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = host_semaphores[host] = asyncio.Semaphore(limit)
+    return semaphore
+
+def drop_none(values):
+    # requests leaves out None params and headers, httpx would send them empty or fail
+    if values is None:
+        return None
+    return {key: value for key, value in values.items() if value is not None}
+
+async def api_get(url, params=None, headers=None):
+    async with get_host_semaphore(url):
+        return await get_http_client().get(url, params=drop_none(params), headers=drop_none(headers))
+
+async def api_post(url, data=None, params=None, headers=None):
+    async with get_host_semaphore(url):
+        return await get_http_client().post(url, data=drop_none(data), params=drop_none(params), headers=drop_none(headers))
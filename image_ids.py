@@ -0,0 +1,6 @@
+import re
+
+# Hypeauditor avatar URLs end in /{id}.jpg, the id names the mirrored object in S3
+def extract_image_id(url):
+    match = re.search(r'/(\d+)\.jpg', url)
+    return match.group(1) if match else None
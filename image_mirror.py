@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import httpx
+from http_client import get_http_client
+from image_ids import extract_image_id
+
+# Images have their own limit on the shared client, separate from the scrapers' per-host one
+IMAGE_CONCURRENCY = int(os.getenv('IMAGE_CONCURRENCY', 16))
+# Bodies are hashed while they stream in and spool to disk past this size
+IMAGE_SPOOL_BYTES = 1024 * 1024
+# Source URL, validators and MD5 of every mirrored image, so unchanged images are
+# answered with a 304 instead of downloaded again
+IMAGE_SOURCES_KEY = os.getenv('IMAGE_SOURCES_KEY', 'image-sources.json')
+
+async def load_image_manifest(pg_pool):
+    """Map image_id to avatar URL for every Instagram user in the latest ingested snapshot."""
+    async with pg_pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT u.ImageURL
+            FROM instagram_stats u
+            JOIN instagram_snapshot s ON s.StatsID = u.ID
+            WHERE s.Day = (SELECT MAX(Day) FROM instagram_snapshot)
+            AND u.ImageURL IS NOT NULL
+        """)
+    image_urls = {}
+    for row in rows:
+        image_id = extract_image_id(row['imageurl'])
+        if image_id:
+            image_urls[image_id] = row['imageurl']
+    return image_urls
+
+async def list_bucket_etags(client, bucket):
+    """Map every object key in the bucket to its ETag, one LIST call per 1000 keys."""
+    def list_etags():
+        etags = {}
+        for page in client.get_paginator('list_objects_v2').paginate(Bucket=bucket):
+            for item in page.get('Contents', []):
+                etags[item['Key']] = item['ETag'].strip('"')
+        return etags
+    return await asyncio.to_thread(list_etags)
+
+async def load_image_sources(client, bucket):
+    def load_sources():
+        try:
+            return json.loads(client.get_object(Bucket=bucket, Key=IMAGE_SOURCES_KEY)['Body'].read())
+        except client.exceptions.NoSuchKey:
+            return {}
+    return await asyncio.to_thread(load_sources)
+
+async def save_image_sources(client, bucket, sources):
+    await asyncio.to_thread(
+        client.put_object,
+        Bucket=bucket,
+        Key=IMAGE_SOURCES_KEY,
+        Body=json.dumps(sources).encode(),
+        ContentType='application/json'
+    )
+
+def conditional_headers(source, url, etag):
+    # Validators only count for the same URL and while the bucket still holds what they describe
+    if not source or source.get("url") != url or source.get("md5") != etag:
+        return {}
+    headers = {}
+    if source.get("etag"):
+        headers['If-None-Match'] = source["etag"]
+    if source.get("last_modified"):
+        headers['If-Modified-Since'] = source["last_modified"]
+    return headers
+
+async def mirror_image(client, bucket, key, url, etags, source, semaphore):
+    """Mirror one image, returns its outcome and its new image-sources entry.
+
+    The outcome is uploaded, unchanged, skipped or failed.
+    """
+    async with semaphore:
+        body = tempfile.SpooledTemporaryFile(max_size=IMAGE_SPOOL_BYTES)
+        with body:
+            digest = hashlib.md5()
+            try:
+                headers = conditional_headers(source, url, etags.get(key))
+                async with get_http_client().stream('GET', url, headers=headers, follow_redirects=True) as response:
+                    if response.status_code == 304:
+                        return "unchanged", source
+                    response.raise_for_status()
+                    content_type = response.headers.get('Content-Type', '')
+                    if 'image' not in content_type:
+                        return "skipped", None
+                    async for chunk in response.aiter_bytes():
+                        digest.update(chunk)
+                        body.write(chunk)
+                    validators = {"etag": response.headers.get('ETag'), "last_modified": response.headers.get('Last-Modified')}
+            except httpx.HTTPError as e:
+                logging.error(f"Error downloading image {key}: {e}")
+                return "failed", None
+
+            if not body.tell():
+                return "skipped", None
+            entry = {"url": url, "md5": digest.hexdigest(), **validators}
+            # A single-part S3 ETag is the MD5 of the body, equal means the image has not changed
+            if etags.get(key) == entry["md5"]:
+                return "unchanged", entry
+
+            body.seek(0)
+            try:
+                await asyncio.to_thread(
+                    client.put_object,
+                    Bucket=bucket,
+                    Key=key,
+                    Body=body,
+                    ContentType=content_type
+                )
+            except Exception as e:
+                logging.error(f"Error saving image {key}: {e}")
+                return "failed", None
+            return "uploaded", entry
+
+async def mirror_images(client, bucket, image_urls, concurrency=IMAGE_CONCURRENCY):
+    """Mirror {image_id: url} into the bucket as {image_id}.jpg, only uploading new or changed images.
+
+    Images whose source answers the stored validators with a 304 are not downloaded
+    at all. Returns the number of images per outcome.
+    """
+    etags, sources = await asyncio.gather(list_bucket_etags(client, bucket), load_image_sources(client, bucket))
+    semaphore = asyncio.Semaphore(concurrency)
+    keys = [f"{image_id}.jpg" for image_id in image_urls]
+    results = await asyncio.gather(*[
+        mirror_image(client, bucket, key, url, etags, sources.get(key), semaphore)
+        for key, url in zip(keys, image_urls.values())
+    ])
+    await save_image_sources(client, bucket, {key: entry for key, (_, entry) in zip(keys, results) if entry})
+    outcomes = [outcome for outcome, _ in results]
+    counts = {outcome: outcomes.count(outcome) for outcome in ["uploaded", "unchanged", "skipped", "failed"]}
+    logging.info(f"Mirrored {len(outcomes)} images: {counts}")
+    return counts
@@ -0,0 +1,225 @@
+import asyncio
+import hmac
+import logging
+import os
+import socket
+import traceback
+from datetime import datetime
+from database import get_mysql_pool, save_image, delete_old_insta_data, delete_old_tiktok_data
+from query_data import ingest_instagram_rows_from_queue, ingest_tiktok_rows_from_queue
+from query_data import refresh_insta_leaderboard, refresh_tiktok_leaderboard
+from leaderboard_cache import publish_leaderboard
+
+# The API only pushes job names here, worker.py pops and runs them
+JOB_TRIGGER_KEY = "jobs-trigger"
+
+# Leases are Redis keys holding the owner's WORKER_ID with a TTL that the owner
+# keeps renewing, if the process dies the lease lapses on its own
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+LEADER_KEY = "jobs-leader"
+LEASE_TTL = 60
+
+RENEW_LEASE_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_LEASE_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# The API imports this module for trigger_job/get_job_status, the scrapers
+# (and BeautifulSoup with them) are only imported by the worker when a job runs
+
+async def scrape_tiktok(redis):
+    from social_scrape import tiktok_scrap
+    mysql_pool = await get_mysql_pool()
+    queue = asyncio.Queue()
+    data, ingested = await asyncio.gather(
+        tiktok_scrap(queue, csv_file_name='scraped_data_tiktok.csv'),
+        ingest_tiktok_rows_from_queue(mysql_pool, queue)
+    )
+    if ingested["status_code"] != 200:
+        # Nothing new was applied, keep the published leaderboard as it is
+        return ingested
+    await refresh_tiktok_leaderboard(mysql_pool)
+    await publish_leaderboard(redis, mysql_pool, 'tiktok')
+    await delete_old_tiktok_data(mysql_pool)
+    return data
+
+async def scrape_instagram(redis):
+    from social_scrape import instagram_scrap
+    mysql_pool = await get_mysql_pool()
+    queue = asyncio.Queue()
+    data, ingested = await asyncio.gather(
+        instagram_scrap(queue, csv_file_name='scraped_data_instagram.csv'),
+        ingest_instagram_rows_from_queue(mysql_pool, queue)
+    )
+    if ingested["status_code"] != 200:
+        # Nothing new was applied, keep the published leaderboard as it is
+        return ingested
+    await refresh_insta_leaderboard(mysql_pool)
+    await publish_leaderboard(redis, mysql_pool, 'instagram')
+    await delete_old_insta_data(mysql_pool)
+    return data
+
+async def save_images(redis):
+    mysql_pool = await get_mysql_pool()
+    return await save_image(mysql_pool)
+
+JOBS = {
+    "scrape_instagram": {"run": scrape_instagram, "cron": {"hour": 0, "minute": 10}},
+    "scrape_tiktok": {"run": scrape_tiktok, "cron": {"hour": 0, "minute": 40}},
+    "save_image": {"run": save_images, "cron": {"hour": 1, "minute": 10}}
+}
+
+# POST /jobs/{name} needs this token in X-Admin-Token, without it the endpoint is disabled
+JOBS_ADMIN_TOKEN = os.getenv('JOBS_ADMIN_TOKEN')
+
+def is_jobs_admin(token):
+    return bool(JOBS_ADMIN_TOKEN) and token is not None and hmac.compare_digest(token, JOBS_ADMIN_TOKEN)
+
+def job_status_key(name):
+    return f"job-{name}"
+
+def job_lock_key(name):
+    return f"job-lock-{name}"
+
+async def acquire_lease(redis, key, ttl=LEASE_TTL):
+    return bool(await redis.set(key, WORKER_ID, expire=ttl, exist=redis.SET_IF_NOT_EXIST))
+
+async def renew_lease(redis, key, ttl=LEASE_TTL):
+    return bool(await redis.eval(RENEW_LEASE_LUA, keys=[key], args=[WORKER_ID, ttl]))
+
+async def release_lease(redis, key):
+    await redis.eval(RELEASE_LEASE_LUA, keys=[key], args=[WORKER_ID])
+
+async def keep_lease(redis, key, job, ttl=LEASE_TTL):
+    """Renew the lease while job runs, cancel job once the lease is lost.
+
+    Another worker can take a lost lease and start the same job, so the job must
+    not outlive it. Renewal errors are retried until the lease would have lapsed.
+    Returns True when it cancelled the job.
+    """
+    loop = asyncio.get_running_loop()
+    renewed = loop.time()
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            held = await renew_lease(redis, key, ttl)
+            if held:
+                renewed = loop.time()
+        except Exception as e:
+            logging.warning(f"Could not renew lease {key}: {e}")
+            held = loop.time() - renewed < ttl
+        if not held:
+            logging.warning(f"Lost lease {key}, cancelling the job")
+            job.cancel()
+            return True
+
+async def hold_leadership(redis, leader, ttl=LEASE_TTL):
+    """Keep trying to become (or stay) the worker that fires the cron jobs.
+
+    leader is an asyncio.Event that is set while this worker holds the lease.
+    Redis errors clear it (the lease cannot be confirmed) and are retried, the
+    lease is renewed first so a worker still holding it gets it back.
+    """
+    try:
+        while True:
+            try:
+                held = await renew_lease(redis, LEADER_KEY, ttl) or await acquire_lease(redis, LEADER_KEY, ttl)
+            except Exception as e:
+                logging.warning(f"Could not confirm the job leader lease: {e}")
+                held = False
+            if held and not leader.is_set():
+                logging.info(f"{WORKER_ID} is now the job leader")
+                leader.set()
+            elif not held and leader.is_set():
+                logging.warning(f"{WORKER_ID} lost the job leader lease")
+                leader.clear()
+            await asyncio.sleep(ttl / 3)
+    finally:
+        leader.clear()
+        await release_lease(redis, LEADER_KEY)
+
+async def set_job_status(redis, name, **fields):
+    await redis.hmset_dict(job_status_key(name), {key: str(value) for key, value in fields.items()})
+
+async def run_job(redis, name):
+    """Run one job by name under its Redis lease, recording the run for the API status endpoint.
+
+    Returns False without running when another worker holds the lease.
+    """
+    lock_key = job_lock_key(name)
+    if not await acquire_lease(redis, lock_key):
+        holder = await redis.get(lock_key, encoding='utf-8')
+        logging.info(f"Skipping job {name}, it is already running on {holder}")
+        await set_job_status(redis, name, skipped_at=datetime.utcnow().isoformat())
+        return False
+
+    started = datetime.utcnow()
+    await set_job_status(redis, name, state="running", worker=WORKER_ID, started_at=started.isoformat(),
+                         finished_at="", duration_seconds="", error="")
+    job = asyncio.create_task(JOBS[name]["run"](redis))
+    renewer = asyncio.create_task(keep_lease(redis, lock_key, job))
+    state, error = "cancelled", ""
+    try:
+        result = await job
+        # The scrapers and save_image report failure in their result instead of raising
+        if isinstance(result, dict) and result.get("status_code", 200) >= 400:
+            logging.error(f"Job {name} failed: {result.get('error')}")
+            state, error = "failed", result.get("error", "")
+        else:
+            state = "succeeded"
+    except asyncio.CancelledError:
+        # Cancelled by keep_lease, anything else cancelling run_job (worker shutdown) propagates
+        if not (renewer.done() and not renewer.cancelled() and renewer.result()):
+            raise
+        error = "Lost the job lease"
+    except Exception as e:
+        logging.error(f"Job {name} failed: {traceback.format_exc()}")
+        state, error = "failed", str(e)
+    finally:
+        renewer.cancel()
+        finished = datetime.utcnow()
+        await set_job_status(redis, name, state=state, finished_at=finished.isoformat(),
+                             duration_seconds=round((finished - started).total_seconds(), 3), error=error)
+        await release_lease(redis, lock_key)
+    return True
+
+async def trigger_job(redis, name):
+    if name not in JOBS:
+        return {
+            "status_code": 404,
+            "error": f"Unknown job {name}"
+        }
+    await set_job_status(redis, name, triggered_at=datetime.utcnow().isoformat())
+    await redis.rpush(JOB_TRIGGER_KEY, name)
+    return {
+        "status_code": 202,
+        "data": {"job": name, "queued": True}
+    }
+
+async def get_job_status(redis):
+    jobs = {}
+    for name in JOBS:
+        status = await redis.hgetall(job_status_key(name), encoding='utf-8')
+        status = {key: value or None for key, value in status.items()}
+        status["lock_holder"] = await redis.get(job_lock_key(name), encoding='utf-8')
+        status["lock_expires_in"] = await redis.ttl(job_lock_key(name)) if status["lock_holder"] else None
+        if status.get("state") == "running" and not status["lock_holder"]:
+            # The worker died mid-run and its lease lapsed
+            status["state"] = "interrupted"
+        jobs[name] = status
+    return {
+        "status_code": 200,
+        "data": {
+            "leader": await redis.get(LEADER_KEY, encoding='utf-8'),
+            "jobs": jobs
+        }
+    }
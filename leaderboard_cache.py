@@ -0,0 +1,126 @@
+import json
+import logging
+import math
+from sorting import INSTA_SORTING, TIKTOK_SORTING
+from query_data import INSTA_LEADERBOARD_SELECT, TIKTOK_LEADERBOARD_SELECT
+from query_data import format_insta_leaderboard, format_tiktok_leaderboard
+from query_data import refresh_insta_leaderboard, refresh_tiktok_leaderboard
+
+LEADERBOARDS = {
+    "instagram": {
+        "sorting": INSTA_SORTING,
+        "query": INSTA_LEADERBOARD_SELECT,
+        "format": format_insta_leaderboard,
+        "refresh": refresh_insta_leaderboard
+    },
+    "tiktok": {
+        "sorting": TIKTOK_SORTING,
+        "query": TIKTOK_LEADERBOARD_SELECT,
+        "format": format_tiktok_leaderboard,
+        "refresh": refresh_tiktok_leaderboard
+    }
+}
+
+def rows_key(platform):
+    return f"leaderboard-{platform}-rows"
+
+def sorted_set_key(platform, column):
+    return f"leaderboard-{platform}-{column.lower()}"
+
+def row_member(row_id):
+    # Zero-padded so ZREVRANGE breaks score ties by ID DESC, like the SQL queries do
+    return f"{row_id:010d}"
+
+def sort_score(value):
+    # Postgres puts NULLs first on DESC sorts, mirror that with +inf
+    if value is None:
+        return math.inf
+    return float(value)
+
+async def publish_leaderboard(redis, pg_pool, platform):
+    """Publish the daily leaderboard table as one Redis sorted set per sort key.
+
+    Row payloads are stored once in a hash keyed by user ID, already formatted
+    the way get_insta_stats/get_tiktok_stats return them.
+    """
+    leaderboard = LEADERBOARDS[platform]
+    columns = sorted(set(leaderboard["sorting"].values()))
+
+    try:
+        async with pg_pool.acquire() as conn:
+            results = await conn.fetch(leaderboard["query"])
+
+        payloads = {}
+        for row, data in zip(results, leaderboard["format"](results)):
+            payloads[row_member(row['id'])] = json.dumps(data)
+
+        transaction = redis.multi_exec()
+        transaction.delete(rows_key(platform), *[sorted_set_key(platform, column) for column in columns])
+        if payloads:
+            transaction.hmset_dict(rows_key(platform), payloads)
+            for column in columns:
+                pairs = []
+                for row in results:
+                    pairs.extend([sort_score(row[column.lower()]), row_member(row['id'])])
+                transaction.zadd(sorted_set_key(platform, column), *pairs)
+        await transaction.execute()
+        logging.info(f"Published {len(payloads)} {platform} leaderboard rows to Redis.")
+    except Exception as e:
+        logging.error(f"Failed to publish {platform} leaderboard to Redis: {e}")
+
+async def ensure_leaderboard(redis, pg_pool, platform):
+    """Build a leaderboard at API startup only when the worker never has.
+
+    The worker refreshes and publishes after every ingest. Refreshing here would
+    rebuild today's snapshot before the scrape has run, so this only refreshes when
+    leaderboard_snapshots has no row for the platform, and only publishes when
+    Redis has no rows for it.
+    """
+    try:
+        async with pg_pool.acquire() as conn:
+            has_snapshot = await conn.fetchval("""
+            SELECT EXISTS (SELECT 1 FROM leaderboard_snapshots WHERE Platform = $1);
+            """, platform)
+        if not has_snapshot:
+            await LEADERBOARDS[platform]["refresh"](pg_pool)
+        if not await redis.exists(rows_key(platform)):
+            await publish_leaderboard(redis, pg_pool, platform)
+    except Exception as e:
+        logging.error(f"Failed to check the {platform} leaderboard: {e}")
+
+async def get_cached_leaderboard(redis, platform, page=1, per_page=30, sort_by="rank"):
+    """Serve a leaderboard page from Redis, or None when it has not been published."""
+    leaderboard = LEADERBOARDS[platform]
+    column = leaderboard["sorting"].get(sort_by.lower(), "RankToday")
+    key = sorted_set_key(platform, column)
+    if page < 1:
+        return {
+            "status_code": 400,
+            "error": "Invalid page"
+        }
+    start = (page - 1) * per_page
+
+    try:
+        total_count = await redis.zcard(key)
+        if not total_count:
+            return None
+
+        ids = await redis.zrevrange(key, start, start + per_page - 1)
+        payloads = await redis.hmget(rows_key(platform), *ids) if ids else []
+        if any(payload is None for payload in payloads):
+            # Sets and rows disagree, let the caller fall back to SQL
+            return None
+    except Exception as e:
+        logging.error(f"Failed to read {platform} leaderboard from Redis: {e}")
+        return None
+
+    return {
+        "status_code": 200,
+        "data": [json.loads(payload) for payload in payloads],
+        "pagination": {
+            "page": page,
+            "per_page": per_page,
+            "total_count": total_count,
+            "total_pages": (total_count + per_page - 1) // per_page
+        }
+    }
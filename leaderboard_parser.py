@@ -0,0 +1,104 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+PARSER_BACKEND = 'lxml'
+
+TIKTOK_FIELDS = [
+    ('Rank', 'row-cell rank'),
+    ('Username', 'contributor__name-content'),
+    ('Comments', 'row-cell comments-avg'),
+    ('Followers', 'row-cell subscribers'),
+    ('Likes', 'row-cell likes-avg'),
+    ('Views', 'row-cell views-avg'),
+    ('Shares', 'row-cell shares-avg'),
+]
+
+INSTAGRAM_FIELDS = [
+    ('Rank', 'row-cell rank'),
+    ('Username', 'contributor__name-content'),
+    ('Category', 'tag__content ellipsis'),
+    ('Followers', 'row-cell subscribers'),
+    ('Country', 'row-cell audience'),
+    ('Engagement', 'row-cell engagement'),
+]
+
+TIKTOK_HEADERS = [name for name, _ in TIKTOK_FIELDS] + ['img']
+INSTAGRAM_HEADERS = [name for name, _ in INSTAGRAM_FIELDS] + ['img']
+
+def has_class(row_class):
+    # The strainer may see the raw class attribute before it is split into a list
+    def check(value):
+        if not value:
+            return False
+        if isinstance(value, str):
+            value = value.split()
+        return row_class in value
+    return check
+
+def compile_fields(row_class, fields):
+    # Selectors with several classes match the whole class attribute (like
+    # find(class_='row-cell rank')), single classes match any element carrying them.
+    exact_selectors = {}
+    class_selectors = {}
+    for index, (_, selector) in enumerate(fields):
+        if ' ' in selector:
+            exact_selectors[selector] = index
+        else:
+            class_selectors[selector] = index
+    return {
+        "row_class": row_class,
+        "exact": exact_selectors,
+        "classes": class_selectors,
+        "image_index": len(fields),
+        # Only the leaderboard rows are built into the tree, the rest of the page is skipped
+        "strainer": SoupStrainer('div', class_=has_class(row_class))
+    }
+
+def match_field(compiled, classes):
+    index = compiled["exact"].get(' '.join(classes))
+    if index is not None:
+        return index
+    for name in classes:
+        index = compiled["classes"].get(name)
+        if index is not None:
+            return index
+    return None
+
+def parse_row(compiled, row):
+    image_index = compiled["image_index"]
+    values = [None] * (image_index + 1)
+
+    # Single walk over the row, the first match of each field wins like find() did
+    for element in row.descendants:
+        if element.name is None:
+            continue
+        classes = element.get('class')
+        if element.name == 'div' and classes and compiled["row_class"] in classes:
+            # Wrapper around nested rows, the inner rows are parsed on their own
+            return None
+        if element.name == 'img':
+            if values[image_index] is None:
+                values[image_index] = element.get('src', '')
+        elif classes:
+            index = match_field(compiled, classes)
+            if index is not None and values[index] is None:
+                values[index] = element.get_text(strip=True)
+
+    return ['' if value is None else value for value in values]
+
+def parse_leaderboard(compiled, html_content):
+    soup = BeautifulSoup(html_content, PARSER_BACKEND, parse_only=compiled["strainer"])
+    data = []
+    for row in soup.find_all('div', class_=compiled["row_class"]):
+        values = parse_row(compiled, row)
+        if values and any(value.strip() for value in values):
+            data.append(values)
+    return data
+
+TIKTOK_LEADERBOARD = compile_fields('tiktok-row', TIKTOK_FIELDS)
+INSTAGRAM_LEADERBOARD = compile_fields('row', INSTAGRAM_FIELDS)
+
+def parse_tiktok_page(html_content):
+    return parse_leaderboard(TIKTOK_LEADERBOARD, html_content)
+
+def parse_instagram_page(html_content):
+    return parse_leaderboard(INSTAGRAM_LEADERBOARD, html_content)
@@ -1,5 +1,10 @@
-import pandas as pd
+import asyncio
+import heapq
+import logging
 import os
+from bisect import bisect_left
+from location_data import NO_STRING, StringList, compile_location_data, open_location_data
+from location_data import location_files_signature, key_trigrams, place_url, search_key
 
 cities = [
         "outram-singapore",
@@ -368,30 +373,216 @@ async def get_city():
             "error": str(e)
         }
 
+LOCATION_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'location')
+CITY_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'city_data.csv')
+# Compiled from the CSVs by compile_locations.py, or on startup when missing or stale
+LOCATION_DATA_FILE = os.getenv('LOCATION_DATA_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'location.idx'))
+
+# Check the CSVs for changes every N seconds and recompile the index, 0 disables it
+LOCATION_RELOAD_SECONDS = int(os.getenv('LOCATION_RELOAD_SECONDS', 0))
+
+# How many prefix matches are ranked per query, and how many trigram postings fuzzy
+# search walks per query, rarest trigrams first (ones like "ing" match most of the index)
+SEARCH_PREFIX_CANDIDATES = 200
+SEARCH_POSTINGS_BUDGET = 10000
+SEARCH_MAX_LIMIT = 50
+
+location_index = None
+
+def load_location_index(path=LOCATION_DATA_FILE, directory=LOCATION_DIRECTORY, city_file=CITY_DATA_FILE):
+    signature = location_files_signature(directory, city_file)
+    try:
+        index = open_location_data(path)
+    except (OSError, ValueError):
+        index = None
+    if index is None or index["signature"] != signature:
+        logging.info(f"Compiling location data into {path}...")
+        compile_location_data(path, directory, city_file)
+        index = open_location_data(path)
+    index["names"] = StringList(index["strings"], index["search_names"])
+    index["keys"] = StringList(index["strings"], index["search_keys"])
+    return index
+
+def get_location_index():
+    global location_index
+    if location_index is None:
+        location_index = load_location_index()
+        logging.info(f"Location index loaded: {len(location_index['city_names'])} cities, "
+                     f"{len(location_index['place_names'])} places.")
+    return location_index
+
+async def watch_location_index(interval=LOCATION_RELOAD_SECONDS):
+    global location_index
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            signature = await asyncio.to_thread(location_files_signature, LOCATION_DIRECTORY, CITY_DATA_FILE)
+            if signature != get_location_index()["signature"]:
+                # Mapped off to the side and swapped in whole, requests never see a half-built index.
+                # When another worker already recompiled the file this only maps it.
+                location_index = await asyncio.to_thread(load_location_index)
+                logging.info("Location index reloaded.")
+        except Exception as e:
+            logging.error(f"Error reloading location index: {e}")
+
+def find_city(index, city):
+    # Position of the city in the city table, None for unknown cities
+    string_id = index["strings"].find(city)
+    if string_id is None:
+        return None
+    position = bisect_left(index["city_names"], string_id)
+    if position == len(index["city_names"]) or index["city_names"][position] != string_id:
+        return None
+    if index["city_urls"][position] == NO_STRING:
+        return None
+    return position
+
+def city_url(index, position):
+    return index["strings"][index["city_urls"][position]]
+
+def find_place_url(index, position, place):
+    string_id = index["strings"].find(place)
+    if string_id is None:
+        return None
+    start, end = index["place_starts"][position], index["place_starts"][position + 1]
+    found = bisect_left(index["place_names"], string_id, start, end)
+    if found == end or index["place_names"][found] != string_id:
+        return None
+    value = index["place_values"][found]
+    return place_url(place, value if value >= 0 else index["strings"][-value - 1])
+
+def city_place_names(index, position):
+    # In file order, like the CSV rows
+    start, end = index["place_starts"][position], index["place_starts"][position + 1]
+    return [index["strings"][index["place_names"][start + rank]] for rank in index["place_order"][start:end]]
+
+def trigram_postings(index, trigram):
+    string_id = index["strings"].find(trigram)
+    if string_id is None:
+        return ()
+    position = bisect_left(index["trigram_names"], string_id)
+    if position == len(index["trigram_names"]) or index["trigram_names"][position] != string_id:
+        return ()
+    return index["postings"][index["trigram_starts"][position]:index["trigram_starts"][position + 1]]
+
+def prefix_start(index, key):
+    # bisect_left over the word starts, Python 3.9's bisect has no key=
+    keys, entries, offsets = index["keys"], index["prefix_entries"], index["prefix_offsets"]
+    low, high = 0, len(entries)
+    while low < high:
+        middle = (low + high) // 2
+        if keys[entries[middle]][offsets[middle]:] < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def prefix_matches(index, key, limit):
+    keys, entries, offsets = index["keys"], index["prefix_entries"], index["prefix_offsets"]
+    ranks = {}
+    position = prefix_start(index, key)
+    while position < len(entries) and len(ranks) < SEARCH_PREFIX_CANDIDATES:
+        entry, offset = entries[position], offsets[position]
+        entry_key = keys[entry]
+        if not entry_key.startswith(key, offset):
+            break
+        # Whole-name prefixes before word prefixes, then shorter names first
+        rank = (offset > 0, len(entry_key), entry_key)
+        if rank < ranks.get(entry, (True, float('inf'), '')):
+            ranks[entry] = rank
+        position += 1
+    return sorted(ranks, key=ranks.get)[:limit]
+
+def fuzzy_matches(index, key, limit, exclude):
+    keys, trigram_counts = index["keys"], index["trigram_counts"]
+    query_trigrams = key_trigrams(key)
+    shared = {}
+    used = 0
+    walked = 0
+    for postings in sorted((trigram_postings(index, trigram) for trigram in query_trigrams), key=len):
+        walked += len(postings)
+        if used and walked > SEARCH_POSTINGS_BUDGET:
+            break
+        used += 1
+        for entry in postings:
+            shared[entry] = shared.get(entry, 0) + 1
+
+    # A typo breaks up to three trigrams, a candidate needs at least half of the walked ones.
+    # Candidates are shortlisted on the rare trigrams alone, only the shortlist gets the
+    # full Dice similarity (names close to the whole query first).
+    needed = max(1, used // 2)
+    shortlist = heapq.nlargest(limit * 5, (
+        (count / (len(query_trigrams) + trigram_counts[entry]), entry)
+        for entry, count in shared.items()
+        if count >= needed and entry not in exclude
+    ))
+    scored = []
+    for _, entry in shortlist:
+        entry_key = keys[entry]
+        common = len(query_trigrams & key_trigrams(entry_key))
+        scored.append((-2 * common / (len(query_trigrams) + trigram_counts[entry]), entry_key, entry))
+    scored.sort()
+    return [entry for *_, entry in scored[:limit]]
+
+def search_results(index, entries):
+    results = []
+    for entry in entries:
+        name = index["names"][entry]
+        if index["search_is_city"][entry]:
+            results.append({"type": "city", "name": name, "url": city_url(index, find_city(index, name))})
+            continue
+        positions = index["search_cities"][index["search_city_starts"][entry]:index["search_city_starts"][entry + 1]]
+        results.append({
+            "type": "place",
+            "name": name,
+            "url": find_place_url(index, positions[0], name),
+            "cities": [index["strings"][index["city_names"][position]] for position in positions]
+        })
+    return results
+
+async def search_locations(q, limit=10):
+    try:
+        key = search_key(q)
+        if not key:
+            return {
+                "status_code": 400,
+                "error": "Query must contain letters or digits"
+            }
+        limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+        index = get_location_index()
+        entries = prefix_matches(index, key, limit)
+        if len(entries) < limit and len(key) >= 3:
+            entries += fuzzy_matches(index, key, limit - len(entries), set(entries))
+        return {
+            "status_code": 200,
+            "data": search_results(index, entries)
+        }
+    except Exception as e:
+        return {
+            "status_code": 500,
+            "error": str(e)
+        }
+
 async def get_city_url(city):
     try:
-        data = pd.read_csv('city_data.csv')
-        if city not in cities:
+        index = get_location_index()
+        position = find_city(index, city)
+        if position is None:
             return {
                 "status_code": 404,
                 "error": "City not found"
             }
-        directory = 'location'
-        for filename in os.listdir(directory):
-            if filename.startswith(city) and filename.endswith('.csv'):
-                file_path = os.path.join(directory, filename)
-                df = pd.read_csv(file_path)
-                return {
-                    "status_code": 200,
-                    "data": {
-                        "url": data[data['city_name'] == city]['url'].values[0],
-                        "location": df['cityname'].tolist()
-                    
-                    }
-                }
+        if not index["city_has_places"][position]:
+            return {
+                "status_code": 200,
+                "data": city_url(index, position)
+            }
         return {
             "status_code": 200,
-            "data": data[data['city_name'] == city]['url'].values[0]
+            "data": {
+                "url": city_url(index, position),
+                "location": city_place_names(index, position)
+            }
         }
     except Exception as e:
         return {
@@ -401,36 +592,33 @@ async def get_city_url(city):
 
 async def get_location(city, place):
     try:
-        if city not in cities:
+        index = get_location_index()
+        position = find_city(index, city)
+        if position is None:
             return {
                 "status_code": 404,
                 "error": "City not found"
             }
-        directory = 'location'
-        for filename in os.listdir(directory):
-            if filename.startswith(city) and filename.endswith('.csv'):
-                file_path = os.path.join(directory, filename)
-                df = pd.read_csv(file_path)
-                return {
-                    "status_code": 200,
-                    "data": {
-                        "location": place,
-                        "url": df[df['cityname'] == place]['url'].values[0]
-                    }
-                }
-        return {
-            "status_code": 404,
-            "error": "Place not found in {}".format(city)
-        }
-    except Exception as e:
-        if str(e) == "index 0 is out of bounds for axis 0 with size 0":
+        if not index["city_has_places"][position]:
             return {
                 "status_code": 404,
-                "error": "No place with name {} found in {}".format(place, city)
+                "error": "Place not found in {}".format(city)
             }
-        else:
+        url = find_place_url(index, position, place)
+        if url is None:
             return {
-                "status_code": 500,
-                "error": str(e)
+                "status_code": 404,
+                "error": "No place with name {} found in {}".format(place, city)
             }
-
+        return {
+            "status_code": 200,
+            "data": {
+                "location": place,
+                "url": url
+            }
+        }
+    except Exception as e:
+        return {
+            "status_code": 500,
+            "error": str(e)
+        }
@@ -0,0 +1,297 @@
+import csv
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+
+# Nearly every place URL is https://www.instagram.com/explore/locations/{id}/{place}/,
+# for those only the numeric id is kept and the URL is rebuilt on lookup
+PLACE_URL = "https://www.instagram.com/explore/locations/{}/{}/"
+PLACE_URL_PATTERN = re.compile(r'https://www\.instagram\.com/explore/locations/(\d+)/([^/]+)/')
+
+# Search keys are lowercased with punctuation, dashes and underscores turned into spaces
+SEARCH_KEY_PATTERN = re.compile(r'[\W_]+')
+
+LOCATION_DATA_MAGIC = b"LOCIDX1\n"
+LOCATION_DATA_VERSION = 1
+# Header is the magic, a uint32 JSON length and the JSON, sections start 8-byte aligned after it
+HEADER_PREFIX = len(LOCATION_DATA_MAGIC) + 4
+NO_STRING = 0xFFFFFFFF
+
+def compact_place_url(place, url):
+    match = PLACE_URL_PATTERN.fullmatch(url)
+    if match and match.group(2) == place:
+        return int(match.group(1))
+    return url
+
+def place_url(place, value):
+    if isinstance(value, int):
+        return PLACE_URL.format(value, place)
+    return value
+
+def search_key(name):
+    return SEARCH_KEY_PATTERN.sub(' ', name.lower()).strip()
+
+def key_trigrams(key):
+    padded = f" {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def location_files_signature(directory, city_file):
+    paths = [city_file] + [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.endswith('.csv')]
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((os.path.basename(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def read_location_csvs(directory, city_file):
+    """Read city_data.csv and location/{city}.csv.
+
+    Returns {city: url} and {city: {place: id or URL}} with places in file order.
+    """
+    city_urls = {}
+    with open(city_file, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            city_urls.setdefault(row['city_name'], row['url'])
+
+    places = {}
+    for name in os.listdir(directory):
+        if not name.endswith('.csv'):
+            continue
+        city_places = {}
+        with open(os.path.join(directory, name), newline='', encoding='utf-8') as file:
+            for row in csv.DictReader(file):
+                # The first row for a place wins, like the old values[0] lookup
+                if row['cityname'] not in city_places:
+                    city_places[row['cityname']] = compact_place_url(row['cityname'], row['url'])
+        places[name[:-len('.csv')]] = city_places
+    return city_urls, places
+
+def build_search_index(city_urls, places):
+    """Index every city and distinct place name for prefix and typo-tolerant search.
+
+    Entries are cities (cities[entry] is None) or place names with the cities they
+    appear in. Prefix search runs over the start of every word of every key, kept
+    sorted as (entry, offset) pairs instead of materialised suffix strings. Fuzzy
+    search uses a trigram -> entries inverted index.
+    """
+    place_cities = {}
+    for city, city_places in places.items():
+        for place in city_places:
+            place_cities.setdefault(place, []).append(city)
+
+    names = []
+    cities = []
+    keys = []
+    for city in city_urls:
+        names.append(city)
+        cities.append(None)
+        keys.append(search_key(city))
+    for place, in_cities in place_cities.items():
+        names.append(place)
+        cities.append(tuple(in_cities))
+        keys.append(search_key(place))
+
+    word_starts = []
+    trigrams = {}
+    trigram_counts = array('H', [0] * len(keys))
+    for entry, key in enumerate(keys):
+        if not key:
+            continue
+        offset = 0
+        while offset != -1:
+            word_starts.append((entry, offset))
+            offset = key.find(' ', offset)
+            if offset != -1:
+                offset += 1
+        entry_trigrams = key_trigrams(key)
+        trigram_counts[entry] = len(entry_trigrams)
+        for trigram in entry_trigrams:
+            postings = trigrams.get(trigram)
+            if postings is None:
+                postings = trigrams[trigram] = array('I')
+            postings.append(entry)
+    word_starts.sort(key=lambda start: keys[start[0]][start[1]:])
+
+    return {
+        "names": names,
+        "cities": cities,
+        "keys": keys,
+        "prefix_entries": array('I', [entry for entry, _ in word_starts]),
+        "prefix_offsets": array('H', [offset for _, offset in word_starts]),
+        "trigrams": trigrams,
+        "trigram_counts": trigram_counts
+    }
+
+def compile_location_data(path, directory, city_file):
+    """Compile the location CSVs and their search index into one memory-mappable file.
+
+    Every string goes into one sorted string table, so a string id orders the same
+    way as the string itself. Everything else is flat arrays of string ids and
+    offsets: cities and their places sorted by name for binary search, the places in
+    file order, and the search index from build_search_index.
+    """
+    signature = location_files_signature(directory, city_file)
+    city_urls, places = read_location_csvs(directory, city_file)
+    search = build_search_index(city_urls, places)
+
+    city_list = sorted(set(city_urls) | set(places))
+    strings = set(city_list) | set(city_urls.values()) | set(search["names"]) | set(search["keys"]) | set(search["trigrams"])
+    for city_places in places.values():
+        strings.update(value for value in city_places.values() if isinstance(value, str))
+    strings = sorted(strings)
+    string_ids = {string: i for i, string in enumerate(strings)}
+
+    encoded = [string.encode('utf-8') for string in strings]
+    string_offsets = array('I', [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    city_positions = {city: position for position, city in enumerate(city_list)}
+    place_starts = array('I', [0])
+    place_names = array('I')
+    place_values = array('q')
+    place_order = array('I')
+    for city in city_list:
+        city_places = places.get(city, {})
+        by_name = sorted(city_places, key=string_ids.get)
+        ranks = {place: rank for rank, place in enumerate(by_name)}
+        place_names.extend(string_ids[place] for place in by_name)
+        # Location ids as they are, raw URLs as -(string id + 1)
+        place_values.extend(
+            city_places[place] if isinstance(city_places[place], int) else -(string_ids[city_places[place]] + 1)
+            for place in by_name
+        )
+        place_order.extend(ranks[place] for place in city_places)
+        place_starts.append(len(place_names))
+
+    search_city_starts = array('I', [0])
+    search_cities = array('I')
+    for in_cities in search["cities"]:
+        search_cities.extend(city_positions[city] for city in in_cities or ())
+        search_city_starts.append(len(search_cities))
+
+    trigram_list = sorted(search["trigrams"])
+    trigram_starts = array('I', [0])
+    postings = array('I')
+    for trigram in trigram_list:
+        postings.extend(search["trigrams"][trigram])
+        trigram_starts.append(len(postings))
+
+    sections = {
+        "strings": array('B', b''.join(encoded)),
+        "string_offsets": string_offsets,
+        "city_names": array('I', [string_ids[city] for city in city_list]),
+        "city_urls": array('I', [string_ids[city_urls[city]] if city in city_urls else NO_STRING for city in city_list]),
+        "city_has_places": array('B', [city in places for city in city_list]),
+        "place_starts": place_starts,
+        "place_names": place_names,
+        "place_values": place_values,
+        "place_order": place_order,
+        "search_names": array('I', [string_ids[name] for name in search["names"]]),
+        "search_keys": array('I', [string_ids[key] for key in search["keys"]]),
+        "search_is_city": array('B', [in_cities is None for in_cities in search["cities"]]),
+        "search_city_starts": search_city_starts,
+        "search_cities": search_cities,
+        "prefix_entries": search["prefix_entries"],
+        "prefix_offsets": search["prefix_offsets"],
+        "trigram_names": array('I', [string_ids[trigram] for trigram in trigram_list]),
+        "trigram_starts": trigram_starts,
+        "postings": postings,
+        "trigram_counts": search["trigram_counts"]
+    }
+
+    layout = {}
+    offset = 0
+    for name, values in sections.items():
+        layout[name] = [offset, len(values) * values.itemsize, values.typecode]
+        offset += -(-len(values) * values.itemsize // 8) * 8
+    header = json.dumps({
+        "version": LOCATION_DATA_VERSION,
+        "byteorder": sys.byteorder,
+        "signature": signature,
+        "sections": layout
+    }).encode('utf-8')
+
+    # Written next to the target and swapped in, readers never map a half-written file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(LOCATION_DATA_MAGIC + len(header).to_bytes(4, 'little') + header)
+        file.write(b'\0' * (-file.tell() % 8))
+        for values in sections.values():
+            file.write(values.tobytes())
+            file.write(b'\0' * (-file.tell() % 8))
+    os.replace(temp_path, path)
+    return signature
+
+class StringTable:
+    """Strings of a compiled location file, read straight from the mapping."""
+
+    def __init__(self, data, start, offsets):
+        self.data = data
+        self.start = start
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, string_id):
+        return self.raw(string_id).decode('utf-8')
+
+    def raw(self, string_id):
+        return self.data[self.start + self.offsets[string_id]:self.start + self.offsets[string_id + 1]]
+
+    def find(self, string):
+        # Binary search over the sorted table, returns the id or None. UTF-8 bytes sort
+        # the same way as the strings, so nothing is decoded along the way.
+        target = string.encode('utf-8')
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.raw(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self) and self.raw(low) == target:
+            return low
+        return None
+
+class StringList:
+    """Sequence of strings given by an array of string ids."""
+
+    def __init__(self, strings, string_ids):
+        self.strings = strings
+        self.string_ids = string_ids
+
+    def __len__(self):
+        return len(self.string_ids)
+
+    def __getitem__(self, index):
+        return self.strings[self.string_ids[index]]
+
+def open_location_data(path):
+    """Memory-map a file written by compile_location_data.
+
+    Returns the file's signature and its sections as zero-copy memoryviews, the
+    pages are shared by every process that maps the same file.
+    """
+    with open(path, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    if data[:len(LOCATION_DATA_MAGIC)] != LOCATION_DATA_MAGIC:
+        raise ValueError(f"{path} is not a compiled location file")
+    header_length = int.from_bytes(data[len(LOCATION_DATA_MAGIC):HEADER_PREFIX], 'little')
+    header = json.loads(data[HEADER_PREFIX:HEADER_PREFIX + header_length])
+    if header["version"] != LOCATION_DATA_VERSION or header["byteorder"] != sys.byteorder:
+        raise ValueError(f"{path} was compiled by another version or on another platform")
+
+    start = -(-(HEADER_PREFIX + header_length) // 8) * 8
+    view = memoryview(data)
+    sections = {
+        name: view[start + offset:start + offset + length].cast(typecode)
+        for name, (offset, length, typecode) in header["sections"].items()
+    }
+    sections["strings"] = StringTable(data, start + header["sections"]["strings"][0], sections["string_offsets"])
+    sections["signature"] = tuple(tuple(entry) for entry in header["signature"])
+    return sections
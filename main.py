@@ -1,37 +1,50 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
+import asyncio
 import json
 import logging
 from typing import Optional
 from pydantic import BaseModel
 from hashtag import hashtag
-from business_discovery import business_discovery, fetch_business_discovery
-from social_scrape import tiktok_scrap, instagram_scrap
-from news import get_instagram_news, newsapi, news_data, serpapi, news_username
+from business_discovery import business_discovery, fetch_business_discovery, user_cache_key, USER_CACHE_SECONDS
+from news import get_instagram_news, newsapi, news_data, serpapi, news_username, NEWS_PARTIAL_CACHE_SECONDS
 # from summarizer import summary
-from location import get_city, get_location, get_city_url
+from location import get_city, get_location, get_city_url, search_locations
+from location import get_location_index, watch_location_index, LOCATION_RELOAD_SECONDS
 from trend import get_trend_1
-from database import get_redis, get_mysql_pool, create_insta_table, create_tiktok_tables, save_image
-from query_data import update_or_insert_instagram_data_from_csv, update_or_insert_tiktok_data_from_csv, get_insta_stats, get_tiktok_stats
-from query_data import query_insta_user_data, query_tiktok_user_data, delete_old_insta_data, delete_old_tiktok_data
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from database import get_redis, get_mysql_pool, create_insta_table, create_tiktok_tables
+from query_data import get_insta_stats, get_tiktok_stats
+from query_data import query_insta_user_data, query_tiktok_user_data
+from leaderboard_cache import ensure_leaderboard, get_cached_leaderboard
+from jobs import trigger_job, get_job_status, is_jobs_admin
+from http_client import get_http_client, close_http_client
 
 app = FastAPI()
-scheduler = AsyncIOScheduler()
 
 redis = None
 mysql_pool = None
+location_reloader = None
 
 @app.on_event("startup")
 async def startup_event():
-    global redis
+    global redis, location_reloader
+    get_http_client()
+    get_location_index()
+    if LOCATION_RELOAD_SECONDS:
+        location_reloader = asyncio.create_task(watch_location_index())
     redis = await get_redis()
     mysql_pool = await get_mysql_pool() 
     await create_insta_table(mysql_pool)
     await create_tiktok_tables(mysql_pool)
+    # The worker keeps the leaderboards current, startup only fills in missing ones
+    await ensure_leaderboard(redis, mysql_pool, 'instagram')
+    await ensure_leaderboard(redis, mysql_pool, 'tiktok')
 
 @app.on_event("shutdown")
 async def shutdown_event():
     global redis, mysql_pool
+    if location_reloader:
+        location_reloader.cancel()
+    await close_http_client()
     if redis:
         redis.close()
         await redis.wait_closed()
@@ -84,50 +97,55 @@ async def get_hashtag(q: str):
 
 @app.get("/getuser")
 async def get_business_discovery(username: str):
-    cache_key = f"business-discovery-{username}"
+    cache_key = user_cache_key(username)
     cached_data = await redis.get(cache_key)
     if cached_data:
         return json.loads(cached_data)
     
     data =  await business_discovery(username)
-    await redis.set(cache_key, json.dumps(data), expire=600)
+    await redis.set(cache_key, json.dumps(data), expire=USER_CACHE_SECONDS)
     return data
 
 @app.get("/getbulkuser")
 async def get_bulk_business_discovery(usernames: str):
-    cache_key = f"business-discovery-bulk-{usernames}"
-    cached_data = await redis.get(cache_key)
-    if cached_data:
-        return json.loads(cached_data)
-    
-    data =  await fetch_business_discovery(usernames)
-    await redis.set(cache_key, json.dumps(data), expire=600)
-    return data
+    # Cached per username, shared with /getuser
+    return await fetch_business_discovery(redis, usernames)
 
-async def scrape_tiktok():
-    mysql_pool = await get_mysql_pool()
-    data = await tiktok_scrap()
-    await update_or_insert_tiktok_data_from_csv(mysql_pool, 'scraped_data_tiktok.csv')
-    await delete_old_tiktok_data(mysql_pool)
-    return data
+@app.get("/jobs")
+async def get_jobs():
+    return await get_job_status(redis)
 
-async def scrape_instagram():
-    
-    mysql_pool = await get_mysql_pool()
-    data = await instagram_scrap()
-    await update_or_insert_instagram_data_from_csv(mysql_pool, 'scraped_data_instagram.csv')
-    await delete_old_insta_data(mysql_pool)
-    return data
+@app.post("/jobs/{name}")
+async def run_job_now(name: str, x_admin_token: Optional[str] = Header(None)):
+    # Only queues the job, worker.py runs it
+    if not is_jobs_admin(x_admin_token):
+        return {
+            "status_code": 403,
+            "error": "Forbidden"
+        }
+    return await trigger_job(redis, name)
 
 @app.get("/tiktokrank")
-async def get_tiktok_influencers(p: int = 1, sort: Optional[str] = 'rank'):
+async def get_tiktok_influencers(p: int = 1, sort: Optional[str] = 'rank', cursor: Optional[str] = None):
+    # Cursor pagination is served by keyset queries, offset pages from Redis
+    if cursor is None:
+        cached_data = await get_cached_leaderboard(redis, 'tiktok', page=p, sort_by=sort)
+        if cached_data:
+            return cached_data
+
     mysql_pool = await get_mysql_pool()
-    return await get_tiktok_stats(mysql_pool, page=p, sort_by=sort)
+    return await get_tiktok_stats(mysql_pool, page=p, sort_by=sort, cursor=cursor)
 
 @app.get("/instagramrank")
-async def get_instagram_influencers(p: int = 1, sort: Optional[str] = 'rank'):
+async def get_instagram_influencers(p: int = 1, sort: Optional[str] = 'rank', cursor: Optional[str] = None):
+    # Cursor pagination is served by keyset queries, offset pages from Redis
+    if cursor is None:
+        cached_data = await get_cached_leaderboard(redis, 'instagram', page=p, sort_by=sort)
+        if cached_data:
+            return cached_data
+
     mysql_pool = await get_mysql_pool()
-    return await get_insta_stats(mysql_pool, page=p, sort_by=sort)
+    return await get_insta_stats(mysql_pool, page=p, sort_by=sort, cursor=cursor)
 
 @app.get("/instagram/{username}")
 async def get_instagram_data(username: str):
@@ -149,7 +167,12 @@ async def get_news():
         return json.loads(cached_data)
     
     data = await get_instagram_news()
-    await redis.set(cache_key, json.dumps(data), expire=600)
+    # A renamed or deleted account fails for good, so partial results are cached too,
+    # just for less time so the other failures are retried soon
+    if data["status_code"] == 200:
+        await redis.set(cache_key, json.dumps(data), expire=600)
+    elif data["status_code"] == 207:
+        await redis.set(cache_key, json.dumps(data), expire=NEWS_PARTIAL_CACHE_SECONDS)
     return data
 
 @app.get("/newsapi")
@@ -203,6 +226,10 @@ async def get_city_data(q: Optional[str] = None):
 async def get_location_data(city: str, place: str):
     return await get_location(city, place)
 
+@app.get("/location_search")
+async def search_location_data(q: str, limit: int = 10):
+    return await search_locations(q, limit)
+
 @app.get("/trend")
 async def get_trend():
     cache_key = "trend1"
@@ -213,15 +240,3 @@ async def get_trend():
     data = await get_trend_1()
     await redis.set(cache_key, json.dumps(data), expire=25920)
     return data
-
-scheduler.add_job(scrape_instagram, 'cron', hour=00, minute=10)
-
-scheduler.add_job(scrape_tiktok, 'cron', hour=00, minute=40)
-
-scheduler.add_job(save_image, 'cron', hour=1, minute=10)
-
-
-@app.on_event("startup")
-async def start_scheduler():
-    scheduler.start()
-
@@ -0,0 +1,39 @@
+# "5.2M", "198.1K", "1,234", "3.4%" -> number, suffix, percent sign
+METRIC_PATTERN = r'^\s*(-?[\d,]*\.?\d+)\s*([KMB]?)\s*(%?)\s*$'
+SUFFIX_MULTIPLIERS = {'': 1.0, 'K': 1e3, 'M': 1e6, 'B': 1e9}
+
+def parse_metrics(values):
+    """Parse abbreviated hypeauditor metrics into a float array, NaN where unparseable.
+
+    Percentages keep their percent value, so "3.4%" parses to 3.4.
+    """
+    import pandas as pd
+    series = pd.Series(values, dtype=object)
+    parts = series.where(series.notna(), '').astype(str).str.upper().str.extract(METRIC_PATTERN)
+    numbers = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    multipliers = parts[1].map(SUFFIX_MULTIPLIERS)
+    return (numbers * multipliers).to_numpy(dtype=float)
+
+def metric_counts(values):
+    """Parse metrics into a list of ints (None where unparseable) for BIGINT columns."""
+    import numpy as np
+    parsed = np.rint(parse_metrics(values))
+    return [None if np.isnan(value) else int(value) for value in parsed]
+
+def metric_rates(values):
+    """Parse metrics into a list of floats (None where unparseable) for REAL columns."""
+    import numpy as np
+    parsed = parse_metrics(values)
+    return [None if np.isnan(value) else float(value) for value in parsed]
+
+def sql_metric_expression(column):
+    # Same parsing as parse_metrics, for backfilling VARCHAR columns in place
+    value = f"upper(btrim({column}))"
+    return f"""
+    CASE WHEN {value} ~ '^-?[0-9,]*\\.?[0-9]+\\s*[KMB]?\\s*%?$' THEN
+        replace(substring({value} from '^-?[0-9,]*\\.?[0-9]+'), ',', '')::numeric
+        * CASE substring({value} from '([KMB])\\s*%?$')
+            WHEN 'K' THEN 1000 WHEN 'M' THEN 1000000 WHEN 'B' THEN 1000000000 ELSE 1
+          END
+    END
+    """
@@ -0,0 +1,35 @@
+"""Fold the per-metric history tables into instagram_snapshot/tiktok_snapshot.
+
+The API does not migrate on startup, run this once per deployment instead. It
+converts old VARCHAR metrics and copies the history tables into the snapshot
+tables, leaving the old tables in place. Once the copy has been checked (and
+backed up), --drop-history drops them, after verifying every user and day
+they hold has a snapshot row:
+
+    python migrate_snapshots.py                 # convert and copy
+    python migrate_snapshots.py --drop-history  # then drop the old tables
+"""
+import argparse
+import asyncio
+import logging
+from database import get_mysql_pool, create_insta_table, create_tiktok_tables
+from database import migrate_metric_columns, migrate_history_to_snapshots, drop_history_tables
+
+async def main(drop_history):
+    pg_pool = await get_mysql_pool()
+    try:
+        await create_insta_table(pg_pool)
+        await create_tiktok_tables(pg_pool)
+        # Old VARCHAR metrics have to be numeric before they are copied over
+        await migrate_metric_columns(pg_pool)
+        await migrate_history_to_snapshots(pg_pool)
+        if drop_history:
+            await drop_history_tables(pg_pool)
+    finally:
+        await pg_pool.close()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drop-history", action="store_true", help="drop the old history tables once every day is in the snapshot tables")
+    asyncio.run(main(parser.parse_args().drop_history))
@@ -1,51 +1,32 @@
-import requests
+import asyncio
 import os
 from dotenv import load_dotenv
-from newsdataapi import NewsDataApiClient
+from http_client import api_get
+from business_discovery import discover_users
 
 load_dotenv()
 
-    
+NEWS_ACCOUNTS = ["mothershipsg",
+    "channelnewsasia",
+    "mustsharenews",
+    "8worldnews",
+    "sgnewsdaily",
+    "fastnews.sg",
+    "sgfollowsall",
+    "sphmediasg",
+    "alvinshtan",
+    "zaobaosg",
+    "lianhewanbao",
+    "shinmindailynews",
+    "stompsingapore",
+    "uweeklysg",
+    "thenewpaper"]
+# /instagramnews caches results where only some accounts failed for this long
+NEWS_PARTIAL_CACHE_SECONDS = int(os.getenv('NEWS_PARTIAL_CACHE_SECONDS', 120))
+
 async def get_instagram_news():
     try:
-        user_id = os.getenv("USER_ID")
-        url = f"https://graph.facebook.com/v3.2/{user_id}"
-
-        all_responses = {}
-
-        news_list = ["mothershipsg",
-            "channelnewsasia",
-            "mustsharenews",
-            "8worldnews",
-            "sgnewsdaily",
-            "fastnews.sg",
-            "sgfollowsall",
-            "sphmediasg",
-            "alvinshtan",
-            "zaobaosg",
-            "lianhewanbao",
-            "shinmindailynews",
-            "stompsingapore",
-            "uweeklysg",
-            "thenewpaper"]
-
-        for news in news_list:
-            params = {
-                "fields" : f"business_discovery.username({news}){{followers_count,media_count,media{{permalink,like_count,media_url,media_type,caption}}}}",
-                "access_token": os.getenv("ACCESS_TOKEN"),
-            }
-
-            response = requests.get(url, params=params)
-
-            if response.status_code == 200:
-                    all_responses[news] = response.json()
-            else:
-                    all_responses[news] = {"error": response.json()}
-
-        return {
-            "status_code": response.status_code,
-            "data": all_responses
-        }
+        return await discover_users(NEWS_ACCOUNTS)
     except Exception as e:
         return {
             "status_code": 500,
@@ -60,7 +41,7 @@ async def newsapi():
             'apiKey': os.getenv("NEWS_API_KEY")
         }
 
-        response = requests.get(url, params=params)
+        response = await api_get(url, params=params)
 
         data = response.json()
 
@@ -76,8 +57,10 @@ async def newsapi():
     
 async def news_data():
     try:
+        from newsdataapi import NewsDataApiClient
         api = NewsDataApiClient(apikey=os.getenv("NEWS_DATA_KEY"))
-        response = api.news_api(country = "sg")
+        # The newsdata client is blocking, run it off the event loop
+        response = await asyncio.to_thread(api.news_api, country = "sg")
         return {
             "status_code": 200,
             "data": response
@@ -139,7 +122,7 @@ async def serpapi(media = None, q = None, topic = None, story = None):
         if story:
             params['story_token'] = story
 
-        response = requests.get(url, params=params)
+        response = await api_get(url, params=params)
 
         data = response.json()
 
@@ -155,24 +138,9 @@ async def serpapi(media = None, q = None, topic = None, story = None):
     
 async def news_username():
     try:
-        news_list = ["mothershipsg",
-            "channelnewsasia",
-            "mustsharenews",
-            "8worldnews",
-            "sgnewsdaily",
-            "fastnews.sg",
-            "sgfollowsall",
-            "sphmediasg",
-            "alvinshtan",
-            "zaobaosg",
-            "lianhewanbao",
-            "shinmindailynews",
-            "stompsingapore",
-            "uweeklysg",
-            "thenewpaper"]
         return {
             "status_code": 200,
-            "data": news_list
+            "data": NEWS_ACCOUNTS
         }
     except Exception as e:
         return {
@@ -3,6 +3,7 @@ import asyncio
 import asyncpg
 import os
 import dotenv
+from metrics import metric_counts, metric_rates
 
 dotenv.load_dotenv()
 
@@ -14,6 +15,12 @@ df_tiktok = pd.read_csv('./scraped_data_tiktok.csv')
 df_insta.fillna(value={'Username': 'N/A', 'Category': 'N/A', 'Country': 'N/A', 'img': 'N/A'}, inplace=True)
 df_tiktok.fillna(value={'Username': 'N/A', 'img': 'N/A'}, inplace=True)
 
+# Metrics are stored as numbers, parse "5.2M" style values once up front
+df_insta['Followers'] = metric_counts(df_insta['Followers'])
+df_insta['Engagement'] = metric_rates(df_insta['Engagement'])
+for column in ['Comments', 'Followers', 'Likes', 'Views', 'Shares']:
+    df_tiktok[column] = metric_counts(df_tiktok[column])
+
 async def populate_insta_database():
     conn = await asyncpg.connect(
         user=os.getenv('DB_USER'), 
@@ -42,23 +49,16 @@ async def populate_insta_database():
             )
 
             if instagram_stats_id:
-                # Insert followers count
-                await conn.execute("""
-                    INSERT INTO followers_insta (InstagramStatsID, FollowersCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, instagram_stats_id, row['Followers'])
-
-                # Insert engagement rate
-                await conn.execute("""
-                    INSERT INTO engagement_history (InstagramStatsID, EngagementRate, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, instagram_stats_id, row['Engagement'])
-
-                # Insert rank
+                # Insert today's snapshot
                 await conn.execute("""
-                    INSERT INTO rank_insta (InstagramStatsID, Position, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, instagram_stats_id, row['Rank'])
+                    INSERT INTO instagram_snapshot (StatsID, Day, Rank, Followers, Engagement, RecordedAt)
+                    VALUES ($1, CURRENT_DATE, $2, $3, $4, NOW())
+                    ON CONFLICT (StatsID, Day) DO UPDATE
+                    SET Rank = EXCLUDED.Rank,
+                        Followers = EXCLUDED.Followers,
+                        Engagement = EXCLUDED.Engagement,
+                        RecordedAt = EXCLUDED.RecordedAt
+                """, instagram_stats_id, row['Rank'], row['Followers'], row['Engagement'])
 
     finally:
         await conn.close()
@@ -89,41 +89,19 @@ async def populate_tiktok_database():
             )
 
             if tiktok_stats_id:
-                # Insert comments count
-                await conn.execute("""
-                    INSERT INTO comments_history (TikTokStatsID, CommentsCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Comments'])
-
-                # Insert followers count
-                await conn.execute("""
-                    INSERT INTO followers_tiktok (TikTokStatsID, FollowersCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Followers'])
-
-                # Insert likes count
-                await conn.execute("""
-                    INSERT INTO likes_history (TikTokStatsID, LikesCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Likes'])
-
-                # Insert views count
-                await conn.execute("""
-                    INSERT INTO views_history (TikTokStatsID, ViewsCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Views'])
-
-                # Insert shares count
-                await conn.execute("""
-                    INSERT INTO shares_history (TikTokStatsID, SharesCount, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Shares'])
-
-                # Insert rank
+                # Insert today's snapshot
                 await conn.execute("""
-                    INSERT INTO rank_tiktok (TikTokStatsID, Position, RecordedAt)
-                    VALUES ($1, $2, NOW())
-                """, tiktok_stats_id, row['Rank'])
+                    INSERT INTO tiktok_snapshot (StatsID, Day, Rank, Followers, Likes, Views, Comments, Shares, RecordedAt)
+                    VALUES ($1, CURRENT_DATE, $2, $3, $4, $5, $6, $7, NOW())
+                    ON CONFLICT (StatsID, Day) DO UPDATE
+                    SET Rank = EXCLUDED.Rank,
+                        Followers = EXCLUDED.Followers,
+                        Likes = EXCLUDED.Likes,
+                        Views = EXCLUDED.Views,
+                        Comments = EXCLUDED.Comments,
+                        Shares = EXCLUDED.Shares,
+                        RecordedAt = EXCLUDED.RecordedAt
+                """, tiktok_stats_id, row['Rank'], row['Followers'], row['Likes'], row['Views'], row['Comments'], row['Shares'])
 
     finally:
         await conn.close()
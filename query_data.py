@@ -1,11 +1,14 @@
+import base64
+import binascii
 import json
-from datetime import datetime, timedelta
-from collections import defaultdict
+from datetime import datetime
 import logging
-import re
 import json
-import pandas as pd
+import math
 from decimal import Decimal
+from metrics import metric_counts, metric_rates
+from sorting import INSTA_SORTING, TIKTOK_SORTING
+from image_ids import extract_image_id
 
 def abbreviate_numbers(json_list):
     def convert_number(value):
@@ -33,23 +36,32 @@ def json_serial(obj):
         return obj.isoformat()
     raise TypeError(f"Type {type(obj)} not serializable")
 
-def extract_image_id(url):
-    match = re.search(r'/(\d+)\.jpg', url)
-    return match.group(1) if match else None
+def build_history(results, metrics):
+    # One row per day already, just drop the metrics that were not recorded that day
+    history = {}
+    for row in results:
+        if row['day'] is None:
+            continue
+        values = {key: row[key.lower()] for key in metrics if row[key.lower()] is not None}
+        if values:
+            history[row['day'].isoformat()] = values
+    return history
 
 async def query_insta_user_data(pg_pool, username):
+    # One snapshot row per day, read through the (StatsID, Day) index for this user only
     query_sql = """
-        SELECT 
-            i.Username, i.Category, i.Country, i.ImageURL, 
-            f.FollowersCount, f.RecordedAt AS FollowersRecordedAt,
-            e.EngagementRate, e.RecordedAt AS EngagementRecordedAt,
-            r.Position, r.RecordedAt AS RankRecordedAt
-        FROM instagram_stats i
-        LEFT JOIN followers_insta f ON i.ID = f.InstagramStatsID
-        LEFT JOIN engagement_history e ON i.ID = e.InstagramStatsID
-        LEFT JOIN rank_insta r ON i.ID = r.InstagramStatsID
-        WHERE i.Username = $1
-        ORDER BY f.RecordedAt DESC, e.RecordedAt DESC, r.RecordedAt DESC
+    WITH user_stats AS (
+        SELECT ID, Username, Category, Country, ImageURL FROM instagram_stats WHERE Username = $1
+    )
+    SELECT
+        u.Username, u.Category, u.Country, u.ImageURL,
+        s.Day,
+        s.Followers AS FollowersCount,
+        s.Engagement AS EngagementRate,
+        s.Rank AS Position
+    FROM user_stats u
+    LEFT JOIN instagram_snapshot s ON s.StatsID = u.ID
+    ORDER BY s.Day DESC;
     """
     try:
         async with pg_pool.acquire() as conn:
@@ -61,35 +73,9 @@ async def query_insta_user_data(pg_pool, username):
                     "Category": results[0]['category'],
                     "Country": results[0]['country'],
                     "ImageURL": results[0]['imageurl'],
-                    "HistoricalData": defaultdict(dict)
+                    "HistoricalData": build_history(results, ["FollowersCount", "EngagementRate", "Position"])
                 }
                 
-                for row in results:
-                    recorded_dates = [
-                        row['followersrecordedat'],
-                        row['engagementrecordedat'],
-                        row['rankrecordedat']
-                    ]
-                    recorded_dates = [d for d in recorded_dates if d is not None]
-                    
-                    for date in recorded_dates:
-                        date_str = date.date().isoformat()
-                        
-                        if row['followersrecordedat'] and row['followersrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["FollowersCount"] = row['followerscount']
-                        
-                        if row['engagementrecordedat'] and row['engagementrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["EngagementRate"] = row['engagementrate']
-                        
-                        if row['rankrecordedat'] and row['rankrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["Position"] = row['position']
-
-                # Convert defaultdict to regular dict and sort by date
-                user_data["HistoricalData"] = dict(sorted(user_data["HistoricalData"].items(), reverse=True))
-                
-                # Remove empty date entries
-                user_data["HistoricalData"] = {k: v for k, v in user_data["HistoricalData"].items() if v}
-                
                 data = json.loads(json.dumps(user_data, default=json_serial))
                 data['ImageURL'] =  extract_image_id(data['ImageURL']) if extract_image_id(data['ImageURL']) else data['ImageURL']
                 return {
@@ -111,21 +97,21 @@ async def query_insta_user_data(pg_pool, username):
 
 async def query_tiktok_user_data(pg_pool, username):
     query_sql = """
-    SELECT 
-        t.Username, t.ImageURL, r.Position,
-        c.CommentsCount, ft.FollowersCount, l.LikesCount, v.ViewsCount, s.SharesCount, 
-        c.RecordedAt AS CommentsRecordedAt, ft.RecordedAt AS FollowersRecordedAt, 
-        l.RecordedAt AS LikesRecordedAt, v.RecordedAt AS ViewsRecordedAt, s.RecordedAt AS SharesRecordedAt,
-        r.RecordedAt AS RankRecordedAt
-    FROM tiktok_stats t
-    LEFT JOIN comments_history c ON t.ID = c.TikTokStatsID
-    LEFT JOIN followers_tiktok ft ON t.ID = ft.TikTokStatsID
-    LEFT JOIN likes_history l ON t.ID = l.TikTokStatsID
-    LEFT JOIN views_history v ON t.ID = v.TikTokStatsID
-    LEFT JOIN shares_history s ON t.ID = s.TikTokStatsID
-    LEFT JOIN rank_tiktok r ON t.ID = r.TikTokStatsID
-    WHERE t.Username = $1
-    ORDER BY ft.RecordedAt DESC, c.RecordedAt DESC, l.RecordedAt DESC, v.RecordedAt DESC, s.RecordedAt DESC, r.RecordedAt DESC;
+    WITH user_stats AS (
+        SELECT ID, Username, ImageURL FROM tiktok_stats WHERE Username = $1
+    )
+    SELECT
+        u.Username, u.ImageURL,
+        s.Day,
+        s.Followers AS FollowersCount,
+        s.Comments AS CommentsCount,
+        s.Likes AS LikesCount,
+        s.Views AS ViewsCount,
+        s.Shares AS SharesCount,
+        s.Rank AS Position
+    FROM user_stats u
+    LEFT JOIN tiktok_snapshot s ON s.StatsID = u.ID
+    ORDER BY s.Day DESC;
     """
 
     try:
@@ -136,47 +122,9 @@ async def query_tiktok_user_data(pg_pool, username):
                 user_data = {
                     "Username": results[0]['username'],
                     "ImageURL": results[0]['imageurl'],
-                    "HistoricalData": defaultdict(dict)
+                    "HistoricalData": build_history(results, ["FollowersCount", "CommentsCount", "LikesCount", "ViewsCount", "SharesCount", "Position"])
                 }
                 
-                for row in results:
-                    recorded_dates = [
-                        row['followersrecordedat'],
-                        row['commentsrecordedat'],
-                        row['likesrecordedat'],
-                        row['viewsrecordedat'],
-                        row['sharesrecordedat'],
-                        row['rankrecordedat']
-                    ]
-                    recorded_dates = [d for d in recorded_dates if d is not None]
-                    
-                    for date in recorded_dates:
-                        date_str = date.date().isoformat()
-                        
-                        if row['followersrecordedat'] and row['followersrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["FollowersCount"] = row['followerscount']
-                        
-                        if row['commentsrecordedat'] and row['commentsrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["CommentsCount"] = row['commentscount']
-                        
-                        if row['likesrecordedat'] and row['likesrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["LikesCount"] = row['likescount']
-                        
-                        if row['viewsrecordedat'] and row['viewsrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["ViewsCount"] = row['viewscount']
-                        
-                        if row['sharesrecordedat'] and row['sharesrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["SharesCount"] = row['sharescount']
-                        
-                        if row['rankrecordedat'] and row['rankrecordedat'].date() == date.date():
-                            user_data["HistoricalData"][date_str]["Position"] = row['position']
-
-                # Convert defaultdict to regular dict and sort by date
-                user_data["HistoricalData"] = dict(sorted(user_data["HistoricalData"].items(), reverse=True))
-                
-                # Remove empty date entries
-                user_data["HistoricalData"] = {k: v for k, v in user_data["HistoricalData"].items() if v}
-                
                 # Use json.dumps with the custom serializer to handle datetime objects
                 return {
                     "status_code": 200,
@@ -196,140 +144,244 @@ async def query_tiktok_user_data(pg_pool, username):
         }
 
 
-async def update_or_insert_instagram_data_from_csv(pg_pool, csv_file_path):
-    upsert_user_sql = """
-    INSERT INTO instagram_stats (Username, Category, Country, ImageURL)
-    VALUES ($1, $2, $3, $4)
-    ON CONFLICT (Username) 
-    DO UPDATE SET Category = $2, Country = $3, ImageURL = $4;
-    """
-    insert_rank_sql = """
-    INSERT INTO rank_insta (InstagramStatsID, Position, RecordedAt)
-    VALUES ((SELECT ID FROM instagram_stats WHERE Username = $1), $2, NOW());
+def to_position(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def to_text(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return str(value)
+
+def complete_rows(rows):
+    complete = []
+    for row in rows:
+        position = to_position(row.get('Rank'))
+        if not row.get('Username') or position is None:
+            logging.warning(f"Skipping incomplete leaderboard row: {row}")
+            continue
+        complete.append((row, position))
+    return complete
+
+def instagram_records(rows):
+    rows = complete_rows(rows)
+    followers = metric_counts([row['Followers'] for row, _ in rows])
+    engagement = metric_rates([row['Engagement'] for row, _ in rows])
+    return [
+        (str(row['Username']), position, to_text(row['Category']), to_text(row['Country']),
+         to_text(row['img']), followers_count, engagement_rate)
+        for (row, position), followers_count, engagement_rate in zip(rows, followers, engagement)
+    ]
+
+def tiktok_records(rows):
+    rows = complete_rows(rows)
+    metrics = [metric_counts([row[field] for row, _ in rows]) for field in ['Comments', 'Followers', 'Likes', 'Views', 'Shares']]
+    return [
+        (str(row['Username']), position, to_text(row['img'])) + counts
+        for (row, position), counts in zip(rows, zip(*metrics))
+    ]
+
+# Each snapshot is staged with binary COPY into a temp table, then written to
+# the stats and snapshot tables by one set-based statement, so ingest takes
+# the same number of round trips for any number of rows. Snapshots are keyed
+# on (StatsID, Day), re-running a day updates only the rows that changed.
+INSTAGRAM_STAGE = {
+    "name": "Instagram",
+    "table": "instagram_stage",
+    "columns": ["username", "position", "category", "country", "imageurl", "followerscount", "engagementrate"],
+    "records": instagram_records,
+    "create_sql": """
+    CREATE TEMP TABLE instagram_stage (
+        Username TEXT NOT NULL,
+        Position INT NOT NULL,
+        Category TEXT,
+        Country TEXT,
+        ImageURL TEXT,
+        FollowersCount BIGINT,
+        EngagementRate REAL
+    ) ON COMMIT DROP;
+    """,
+    "apply_sql": """
+    WITH users AS (
+        INSERT INTO instagram_stats (Username, Category, Country, ImageURL)
+        SELECT DISTINCT ON (Username) Username, Category, Country, ImageURL
+        FROM instagram_stage
+        ORDER BY Username, Position
+        ON CONFLICT (Username)
+        DO UPDATE SET Category = EXCLUDED.Category, Country = EXCLUDED.Country, ImageURL = EXCLUDED.ImageURL
+        RETURNING ID, Username
+    )
+    INSERT INTO instagram_snapshot AS snapshot (StatsID, Day, Rank, Followers, Engagement, RecordedAt)
+    SELECT DISTINCT ON (users.ID) users.ID, CURRENT_DATE, s.Position, s.FollowersCount, s.EngagementRate, NOW()
+    FROM instagram_stage s
+    JOIN users ON users.Username = s.Username
+    ORDER BY users.ID, s.Position
+    ON CONFLICT (StatsID, Day)
+    DO UPDATE SET Rank = EXCLUDED.Rank, Followers = EXCLUDED.Followers, Engagement = EXCLUDED.Engagement, RecordedAt = EXCLUDED.RecordedAt
+    WHERE (snapshot.Rank, snapshot.Followers, snapshot.Engagement)
+        IS DISTINCT FROM (EXCLUDED.Rank, EXCLUDED.Followers, EXCLUDED.Engagement);
     """
-    insert_followers_sql = """
-    INSERT INTO followers_insta (InstagramStatsID, FollowersCount, RecordedAt)
-    VALUES ((SELECT ID FROM instagram_stats WHERE Username = $1), $2, NOW());
+}
+
+TIKTOK_STAGE = {
+    "name": "TikTok",
+    "table": "tiktok_stage",
+    "columns": ["username", "position", "imageurl", "commentscount", "followerscount", "likescount", "viewscount", "sharescount"],
+    "records": tiktok_records,
+    "create_sql": """
+    CREATE TEMP TABLE tiktok_stage (
+        Username TEXT NOT NULL,
+        Position INT NOT NULL,
+        ImageURL TEXT,
+        CommentsCount BIGINT,
+        FollowersCount BIGINT,
+        LikesCount BIGINT,
+        ViewsCount BIGINT,
+        SharesCount BIGINT
+    ) ON COMMIT DROP;
+    """,
+    "apply_sql": """
+    WITH users AS (
+        INSERT INTO tiktok_stats (Username, ImageURL)
+        SELECT DISTINCT ON (Username) Username, ImageURL
+        FROM tiktok_stage
+        ORDER BY Username, Position
+        ON CONFLICT (Username)
+        DO UPDATE SET ImageURL = EXCLUDED.ImageURL
+        RETURNING ID, Username
+    )
+    INSERT INTO tiktok_snapshot AS snapshot (StatsID, Day, Rank, Followers, Likes, Views, Comments, Shares, RecordedAt)
+    SELECT DISTINCT ON (users.ID) users.ID, CURRENT_DATE, s.Position, s.FollowersCount, s.LikesCount, s.ViewsCount, s.CommentsCount, s.SharesCount, NOW()
+    FROM tiktok_stage s
+    JOIN users ON users.Username = s.Username
+    ORDER BY users.ID, s.Position
+    ON CONFLICT (StatsID, Day)
+    DO UPDATE SET Rank = EXCLUDED.Rank, Followers = EXCLUDED.Followers, Likes = EXCLUDED.Likes, Views = EXCLUDED.Views,
+        Comments = EXCLUDED.Comments, Shares = EXCLUDED.Shares, RecordedAt = EXCLUDED.RecordedAt
+    WHERE (snapshot.Rank, snapshot.Followers, snapshot.Likes, snapshot.Views, snapshot.Comments, snapshot.Shares)
+        IS DISTINCT FROM (EXCLUDED.Rank, EXCLUDED.Followers, EXCLUDED.Likes, EXCLUDED.Views, EXCLUDED.Comments, EXCLUDED.Shares);
     """
-    insert_engagement_sql = """
-    INSERT INTO engagement_history (InstagramStatsID, EngagementRate, RecordedAt)
-    VALUES ((SELECT ID FROM instagram_stats WHERE Username = $1), $2, NOW());
+}
+
+async def copy_to_stage(conn, stage, rows):
+    records = stage["records"](rows)
+    if records:
+        await conn.copy_records_to_table(stage["table"], records=records, columns=stage["columns"])
+    return len(records)
+
+async def ingest_rows(pg_pool, stage, rows):
+    async with pg_pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(stage["create_sql"])
+            staged = await copy_to_stage(conn, stage, rows)
+            await conn.execute(stage["apply_sql"])
+    return staged
+
+async def ingest_rows_from_queue(pg_pool, queue, stage):
+    """Stage pages of rows from queue until None, then apply the snapshot at once.
+
+    Each page is copied as it arrives so ingest overlaps with the scrape.
+    Returns the number of rows staged.
     """
+    staged = 0
+    failed = False
+    async with pg_pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(stage["create_sql"])
+            while True:
+                rows = await queue.get()
+                if rows is None:
+                    break
+                if failed:
+                    continue
+                try:
+                    staged += await copy_to_stage(conn, stage, rows)
+                except Exception as e:
+                    # Keep draining the queue so the scraper is never left waiting
+                    logging.error(f"Failed to stage {stage['name']} rows: {e}")
+                    failed = True
+            if failed:
+                raise Exception(f"{stage['name']} snapshot was not fully staged")
+            if staged:
+                await conn.execute(stage["apply_sql"])
+    return staged
+
+async def ingest_instagram_rows_from_queue(pg_pool, queue):
+    try:
+        staged = await ingest_rows_from_queue(pg_pool, queue, INSTAGRAM_STAGE)
+        logging.info(f"Ingested {staged} Instagram rows.")
+        return {
+            "status_code": 200,
+            "data": staged
+        }
+    except Exception as e:
+        logging.error(f"Failed to ingest Instagram data: {e}")
+        return {
+            "status_code": 500,
+            "error": f"Failed to ingest Instagram data: {e}"
+        }
+
+async def ingest_tiktok_rows_from_queue(pg_pool, queue):
+    try:
+        staged = await ingest_rows_from_queue(pg_pool, queue, TIKTOK_STAGE)
+        logging.info(f"Ingested {staged} TikTok rows.")
+        return {
+            "status_code": 200,
+            "data": staged
+        }
+    except Exception as e:
+        logging.error(f"Failed to ingest TikTok data: {e}")
+        return {
+            "status_code": 500,
+            "error": f"Failed to ingest TikTok data: {e}"
+        }
 
+def read_rows_from_csv(csv_file_path):
+    import pandas as pd
     df = pd.read_csv(csv_file_path)
-    df = df.where(pd.notnull(df), None)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return df.to_dict('records')
 
+async def update_or_insert_instagram_data_from_csv(pg_pool, csv_file_path):
     try:
-        async with pg_pool.acquire() as conn:
-            async with conn.transaction():
-                for index, row in df.iterrows():
-                    # Upsert user data
-                    await conn.execute(upsert_user_sql, 
-                        row['Username'], row['Category'], row['Country'], row['img']
-                    )
-
-                    # Always insert new rank, followers, and engagement records
-                    await conn.execute(insert_rank_sql, 
-                        row['Username'], row['Rank']
-                    )
-                    await conn.execute(insert_followers_sql, 
-                        row['Username'], row['Followers']
-                    )
-                    await conn.execute(insert_engagement_sql, 
-                        row['Username'], row['Engagement']
-                    )
-
-                logging.info("Instagram data updated successfully from CSV.")
+        await ingest_rows(pg_pool, INSTAGRAM_STAGE, read_rows_from_csv(csv_file_path))
+        logging.info("Instagram data updated successfully from CSV.")
     except Exception as e:
         logging.error(f"Failed to update or insert Instagram data from CSV: {e}")
 
 async def update_or_insert_tiktok_data_from_csv(pg_pool, csv_file_path):
-    upsert_user_sql = """
-    INSERT INTO tiktok_stats (Username, ImageURL)
-    VALUES ($1, $2)
-    ON CONFLICT (Username) 
-    DO UPDATE SET ImageURL = $2
-    RETURNING ID;
-    """
-
-    insert_rank_sql = """
-    INSERT INTO rank_tiktok (TikTokStatsID, Position, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    insert_comments_sql = """
-    INSERT INTO comments_history (TikTokStatsID, CommentsCount, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    insert_followers_sql = """
-    INSERT INTO followers_tiktok (TikTokStatsID, FollowersCount, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    insert_likes_sql = """
-    INSERT INTO likes_history (TikTokStatsID, LikesCount, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    insert_views_sql = """
-    INSERT INTO views_history (TikTokStatsID, ViewsCount, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    insert_shares_sql = """
-    INSERT INTO shares_history (TikTokStatsID, SharesCount, RecordedAt)
-    VALUES ($1, $2, NOW());
-    """
-
-    df = pd.read_csv(csv_file_path)
-    df = df.where(pd.notnull(df), None)
-
     try:
-        async with pg_pool.acquire() as conn:
-            async with conn.transaction():
-                for index, row in df.iterrows():
-                    # Upsert user data and get the user ID
-                    user_id = await conn.fetchval(upsert_user_sql, 
-                        row['Username'], row['img']
-                    )
-
-                    # Always insert new records for all metrics
-                    await conn.execute(insert_rank_sql, user_id, row['Rank'])
-                    await conn.execute(insert_comments_sql, user_id, row['Comments'])
-                    await conn.execute(insert_followers_sql, user_id, row['Followers'])
-                    await conn.execute(insert_likes_sql, user_id, row['Likes'])
-                    await conn.execute(insert_views_sql, user_id, row['Views'])
-                    await conn.execute(insert_shares_sql, user_id, row['Shares'])
-
-            logging.info("TikTok data updated successfully from CSV.")
+        await ingest_rows(pg_pool, TIKTOK_STAGE, read_rows_from_csv(csv_file_path))
+        logging.info("TikTok data updated successfully from CSV.")
     except Exception as e:
         logging.error(f"Failed to update or insert TikTok data from CSV: {e}")
 
-async def get_insta_stats(pg_pool, page=1, per_page=30, sort_by="rank"):
-
-    sorting = {
-        "followers": "FollowersToday",
-        "engagement": "EngagementToday",
-        "rank": "RankToday",
-        "followers7": "Followers7DaysAgo",
-        "engagement7": "Engagement7DaysAgo",
-        "rank7": "Rank7DaysAgo",
-        "followers14": "Followers14DaysAgo",
-        "engagement14": "Engagement14DaysAgo",
-        "rank14": "Rank14DaysAgo",
-        "followers28": "Followers28DaysAgo",
-        "engagement28": "Engagement28DaysAgo",
-        "rank28": "Rank28DaysAgo"
-    }
-
-    user_sort_key = sort_by.lower()
-
-    order_sort_key = sorting.get(user_sort_key, "RankToday")
-
-    offset = (page - 1) * per_page
-
-    query = """
+async def refresh_insta_leaderboard(pg_pool):
+    # Precompute the whole leaderboard once per ingest, rank pages then only read this table
+    refresh_sql = """
+    INSERT INTO instagram_leaderboard_daily (
+        SnapshotDate,
+        ID,
+        Username,
+        Category,
+        Country,
+        ImageURL,
+        FollowersToday,
+        EngagementToday,
+        RankToday,
+        Followers7DaysAgo,
+        Engagement7DaysAgo,
+        Rank7DaysAgo,
+        Followers14DaysAgo,
+        Engagement14DaysAgo,
+        Rank14DaysAgo,
+        Followers28DaysAgo,
+        Engagement28DaysAgo,
+        Rank28DaysAgo
+    )
+    SELECT CURRENT_DATE, leaderboard.* FROM (
     SELECT 
         insta_stats.ID,
         insta_stats.Username,
@@ -338,79 +390,317 @@ async def get_insta_stats(pg_pool, page=1, per_page=30, sort_by="rank"):
         insta_stats.ImageURL,
         
         -- Today's data
-        convert_to_number(MAX(f1.FollowersCount)::text) AS FollowersToday,
-        convert_to_number(MAX(e1.EngagementRate)::text) AS EngagementToday,
-        MAX(r1.Position) AS RankToday,
+        s1.Followers AS FollowersToday,
+        s1.Engagement AS EngagementToday,
+        s1.Rank AS RankToday,
 
         -- 7 days ago
-        convert_to_number(MAX(f7.FollowersCount)::text) AS Followers7DaysAgo,
-        convert_to_number(MAX(e7.EngagementRate)::text) AS Engagement7DaysAgo,
-        MAX(r7.Position) AS Rank7DaysAgo,
+        s7.Followers AS Followers7DaysAgo,
+        s7.Engagement AS Engagement7DaysAgo,
+        s7.Rank AS Rank7DaysAgo,
         
         -- 14 days ago
-        convert_to_number(MAX(f14.FollowersCount)::text) AS Followers14DaysAgo,
-        convert_to_number(MAX(e14.EngagementRate)::text) AS Engagement14DaysAgo,
-        MAX(r14.Position) AS Rank14DaysAgo,
+        s14.Followers AS Followers14DaysAgo,
+        s14.Engagement AS Engagement14DaysAgo,
+        s14.Rank AS Rank14DaysAgo,
         
         -- 28 days ago
-        convert_to_number(MAX(f28.FollowersCount)::text) AS Followers28DaysAgo,
-        convert_to_number(MAX(e28.EngagementRate)::text) AS Engagement28DaysAgo,
-        MAX(r28.Position) AS Rank28DaysAgo
+        s28.Followers AS Followers28DaysAgo,
+        s28.Engagement AS Engagement28DaysAgo,
+        s28.Rank AS Rank28DaysAgo
     FROM 
         instagram_stats insta_stats
     LEFT JOIN 
-        followers_insta f1 ON insta_stats.ID = f1.InstagramStatsID AND DATE(f1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        engagement_history e1 ON insta_stats.ID = e1.InstagramStatsID AND DATE(e1.RecordedAt) = CURRENT_DATE
+        instagram_snapshot s1 ON insta_stats.ID = s1.StatsID AND s1.Day = CURRENT_DATE
     LEFT JOIN 
-        rank_insta r1 ON insta_stats.ID = r1.InstagramStatsID AND DATE(r1.RecordedAt) = CURRENT_DATE
-    
-    -- 7 days ago joins
-    LEFT JOIN 
-        followers_insta f7 ON insta_stats.ID = f7.InstagramStatsID AND DATE(f7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        engagement_history e7 ON insta_stats.ID = e7.InstagramStatsID AND DATE(e7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
+        instagram_snapshot s7 ON insta_stats.ID = s7.StatsID AND s7.Day = CURRENT_DATE - 7
     LEFT JOIN 
-        rank_insta r7 ON insta_stats.ID = r7.InstagramStatsID AND DATE(r7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    
-    -- 14 days ago joins
-    LEFT JOIN 
-        followers_insta f14 ON insta_stats.ID = f14.InstagramStatsID AND DATE(f14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
+        instagram_snapshot s14 ON insta_stats.ID = s14.StatsID AND s14.Day = CURRENT_DATE - 14
     LEFT JOIN 
-        engagement_history e14 ON insta_stats.ID = e14.InstagramStatsID AND DATE(e14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
+        instagram_snapshot s28 ON insta_stats.ID = s28.StatsID AND s28.Day = CURRENT_DATE - 28
+    ) leaderboard;
+    """
+
+    snapshot_sql = """
+    INSERT INTO leaderboard_snapshots (Platform, SnapshotDate, TotalCount, RefreshedAt)
+    SELECT $1, CURRENT_DATE, COUNT(*), NOW() FROM instagram_leaderboard_daily
+    ON CONFLICT (Platform)
+    DO UPDATE SET SnapshotDate = EXCLUDED.SnapshotDate, TotalCount = EXCLUDED.TotalCount, RefreshedAt = EXCLUDED.RefreshedAt;
+    """
+
+    try:
+        async with pg_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM instagram_leaderboard_daily;")
+                await conn.execute(refresh_sql)
+                await conn.execute(snapshot_sql, 'instagram')
+            await conn.execute("ANALYZE instagram_leaderboard_daily;")
+            logging.info("Instagram leaderboard refreshed.")
+    except Exception as e:
+        logging.error(f"Failed to refresh Instagram leaderboard: {e}")
+
+async def refresh_tiktok_leaderboard(pg_pool):
+    refresh_sql = """
+    INSERT INTO tiktok_leaderboard_daily (
+        SnapshotDate,
+        ID,
+        Username,
+        ImageURL,
+        FollowersToday,
+        LikesToday,
+        ViewsToday,
+        CommentsToday,
+        SharesToday,
+        RankToday,
+        Followers7DaysAgo,
+        Likes7DaysAgo,
+        Views7DaysAgo,
+        Comments7DaysAgo,
+        Shares7DaysAgo,
+        Rank7DaysAgo,
+        Followers14DaysAgo,
+        Likes14DaysAgo,
+        Views14DaysAgo,
+        Comments14DaysAgo,
+        Shares14DaysAgo,
+        Rank14DaysAgo,
+        Followers28DaysAgo,
+        Likes28DaysAgo,
+        Views28DaysAgo,
+        Comments28DaysAgo,
+        Shares28DaysAgo,
+        Rank28DaysAgo
+    )
+    SELECT CURRENT_DATE, leaderboard.* FROM (
+    SELECT 
+        tiktok_stats.ID,
+        tiktok_stats.Username,
+        tiktok_stats.ImageURL,
+        
+        -- Today's data
+        s1.Followers AS FollowersToday,
+        s1.Likes AS LikesToday,
+        s1.Views AS ViewsToday,
+        s1.Comments AS CommentsToday,
+        s1.Shares AS SharesToday,
+        s1.Rank AS RankToday,
+        
+        -- 7 days ago
+        s7.Followers AS Followers7DaysAgo,
+        s7.Likes AS Likes7DaysAgo,
+        s7.Views AS Views7DaysAgo,
+        s7.Comments AS Comments7DaysAgo,
+        s7.Shares AS Shares7DaysAgo,
+        s7.Rank AS Rank7DaysAgo,
+        
+        -- 14 days ago
+        s14.Followers AS Followers14DaysAgo,
+        s14.Likes AS Likes14DaysAgo,
+        s14.Views AS Views14DaysAgo,
+        s14.Comments AS Comments14DaysAgo,
+        s14.Shares AS Shares14DaysAgo,
+        s14.Rank AS Rank14DaysAgo,
+        
+        -- 28 days ago
+        s28.Followers AS Followers28DaysAgo,
+        s28.Likes AS Likes28DaysAgo,
+        s28.Views AS Views28DaysAgo,
+        s28.Comments AS Comments28DaysAgo,
+        s28.Shares AS Shares28DaysAgo,
+        s28.Rank AS Rank28DaysAgo
+    FROM 
+        tiktok_stats
     LEFT JOIN 
-        rank_insta r14 ON insta_stats.ID = r14.InstagramStatsID AND DATE(r14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    
-    -- 28 days ago joins
+        tiktok_snapshot s1 ON tiktok_stats.ID = s1.StatsID AND s1.Day = CURRENT_DATE
     LEFT JOIN 
-        followers_insta f28 ON insta_stats.ID = f28.InstagramStatsID AND DATE(f28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
+        tiktok_snapshot s7 ON tiktok_stats.ID = s7.StatsID AND s7.Day = CURRENT_DATE - 7
     LEFT JOIN 
-        engagement_history e28 ON insta_stats.ID = e28.InstagramStatsID AND DATE(e28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
+        tiktok_snapshot s14 ON tiktok_stats.ID = s14.StatsID AND s14.Day = CURRENT_DATE - 14
     LEFT JOIN 
-        rank_insta r28 ON insta_stats.ID = r28.InstagramStatsID AND DATE(r28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    GROUP BY
-        insta_stats.ID, insta_stats.Username, insta_stats.Category, insta_stats.Country, insta_stats.ImageURL
-    ORDER BY
-        {} DESC
-        LIMIT $1 OFFSET $2
-    """.format(order_sort_key)
+        tiktok_snapshot s28 ON tiktok_stats.ID = s28.StatsID AND s28.Day = CURRENT_DATE - 28
+    ) leaderboard;
+    """
 
-    count_query = """
-    SELECT COUNT(*) FROM instagram_stats
+    snapshot_sql = """
+    INSERT INTO leaderboard_snapshots (Platform, SnapshotDate, TotalCount, RefreshedAt)
+    SELECT $1, CURRENT_DATE, COUNT(*), NOW() FROM tiktok_leaderboard_daily
+    ON CONFLICT (Platform)
+    DO UPDATE SET SnapshotDate = EXCLUDED.SnapshotDate, TotalCount = EXCLUDED.TotalCount, RefreshedAt = EXCLUDED.RefreshedAt;
     """
 
     try:
         async with pg_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM tiktok_leaderboard_daily;")
+                await conn.execute(refresh_sql)
+                await conn.execute(snapshot_sql, 'tiktok')
+            await conn.execute("ANALYZE tiktok_leaderboard_daily;")
+            logging.info("TikTok leaderboard refreshed.")
+    except Exception as e:
+        logging.error(f"Failed to refresh TikTok leaderboard: {e}")
+
+INSTA_LEADERBOARD_SELECT = """
+    SELECT
+        ID,
+        Username,
+        Category,
+        Country,
+        ImageURL,
+        FollowersToday,
+        EngagementToday,
+        RankToday,
+        Followers7DaysAgo,
+        Engagement7DaysAgo,
+        Rank7DaysAgo,
+        Followers14DaysAgo,
+        Engagement14DaysAgo,
+        Rank14DaysAgo,
+        Followers28DaysAgo,
+        Engagement28DaysAgo,
+        Rank28DaysAgo
+    FROM
+        instagram_leaderboard_daily
+"""
+
+TIKTOK_LEADERBOARD_SELECT = """
+    SELECT
+        ID,
+        Username,
+        ImageURL,
+        FollowersToday,
+        LikesToday,
+        ViewsToday,
+        CommentsToday,
+        SharesToday,
+        RankToday,
+        Followers7DaysAgo,
+        Likes7DaysAgo,
+        Views7DaysAgo,
+        Comments7DaysAgo,
+        Shares7DaysAgo,
+        Rank7DaysAgo,
+        Followers14DaysAgo,
+        Likes14DaysAgo,
+        Views14DaysAgo,
+        Comments14DaysAgo,
+        Shares14DaysAgo,
+        Rank14DaysAgo,
+        Followers28DaysAgo,
+        Likes28DaysAgo,
+        Views28DaysAgo,
+        Comments28DaysAgo,
+        Shares28DaysAgo,
+        Rank28DaysAgo
+    FROM
+        tiktok_leaderboard_daily
+"""
+
+def format_insta_leaderboard(results):
+    data = [dict(row) for row in results]
+    for user in data:
+        user['imageurl'] = extract_image_id(user['imageurl']) if extract_image_id(user['imageurl']) else user['imageurl']
+    return abbreviate_numbers(data)
+
+def format_tiktok_leaderboard(results):
+    data = [dict(row) for row in results]
+    return abbreviate_numbers(data)
+
+def sort_column_type(column):
+    if column.startswith('Rank'):
+        return 'INT'
+    if column.startswith('Engagement'):
+        return 'REAL'
+    return 'BIGINT'
+
+def encode_cursor(value, row_id):
+    payload = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if value is not None and not isinstance(value, (int, float)):
+        raise ValueError("Invalid cursor")
+    return value, int(row_id)
+
+async def fetch_keyset_page(conn, select_sql, column, per_page, cursor_key):
+    # Rows are ordered by (column DESC NULLS FIRST, ID DESC), the cursor holds the
+    # sort value and ID of the last row served so any page is one index range scan.
+    order_sql = f"ORDER BY {column} DESC, ID DESC LIMIT $1"
+    if cursor_key is None:
+        results = await conn.fetch(f"{select_sql} {order_sql}", per_page)
+    else:
+        value, row_id = cursor_key
+        if value is None:
+            where_sql = f"WHERE ({column} IS NULL AND ID < $2) OR {column} IS NOT NULL"
+            results = await conn.fetch(f"{select_sql} {where_sql} {order_sql}", per_page, row_id)
+        else:
+            where_sql = f"WHERE ({column}, ID) < ($2::{sort_column_type(column)}, $3)"
+            results = await conn.fetch(f"{select_sql} {where_sql} {order_sql}", per_page, value, row_id)
+
+    next_cursor = None
+    if len(results) == per_page:
+        last = results[-1]
+        next_cursor = encode_cursor(last[column.lower()], last['id'])
+    return results, next_cursor
+
+async def fetch_total_count(conn, platform):
+    # Counted once per snapshot by the leaderboard refresh
+    total_count = await conn.fetchval("""
+    SELECT TotalCount FROM leaderboard_snapshots WHERE Platform = $1
+    """, platform)
+    return total_count or 0
+
+async def get_insta_stats(pg_pool, page=1, per_page=30, sort_by="rank", cursor=None):
+    user_sort_key = sort_by.lower()
+
+    order_sort_key = INSTA_SORTING.get(user_sort_key, "RankToday")
+
+    offset = (page - 1) * per_page
+
+    cursor_key = None
+    if cursor:
+        try:
+            cursor_key = decode_cursor(cursor)
+        except (ValueError, TypeError, binascii.Error):
+            return {
+                "status_code": 400,
+                "error": "Invalid cursor"
+            }
+    elif cursor is None and page < 1:
+        return {
+            "status_code": 400,
+            "error": "Invalid page"
+        }
+
+    query = INSTA_LEADERBOARD_SELECT + """
+    ORDER BY
+        {} DESC, ID DESC
+    LIMIT $1 OFFSET $2
+    """.format(order_sort_key)
+
+    try:
+        async with pg_pool.acquire() as conn:
+            total_count = await fetch_total_count(conn, 'instagram')
+
+            if cursor is not None:
+                results, next_cursor = await fetch_keyset_page(conn, INSTA_LEADERBOARD_SELECT, order_sort_key, per_page, cursor_key)
+                return {
+                    "status_code": 200,
+                    "data": format_insta_leaderboard(results),
+                    "pagination": {
+                        "per_page": per_page,
+                        "total_count": total_count,
+                        "total_pages": (total_count + per_page - 1) // per_page,
+                        "next_cursor": next_cursor
+                    }
+                }
+
             results = await conn.fetch(query, per_page, offset)
-            total_count = await conn.fetchval(count_query)
-            
-            data = [dict(row) for row in results]
-            for user in data:
-                user['imageurl'] = extract_image_id(user['imageurl']) if extract_image_id(user['imageurl']) else user['imageurl']
             
             total_pages = (total_count + per_page - 1) // per_page
             
-            json_data = abbreviate_numbers(data)
+            json_data = format_insta_leaderboard(results)
 
             return {
                 "status_code": 200,
@@ -430,153 +720,56 @@ async def get_insta_stats(pg_pool, page=1, per_page=30, sort_by="rank"):
         }
     
 
-async def get_tiktok_stats(pg_pool, page=1, per_page=30, sort_by="rank"):
-    sorting = {
-        "followers": "FollowersToday",
-        "likes": "LikesToday",
-        "views": "ViewsToday",
-        "comments": "CommentsToday",
-        "shares": "SharesToday",
-        "rank": "RankToday",
-        "followers7": "Followers7DaysAgo",
-        "likes7": "Likes7DaysAgo",
-        "views7": "Views7DaysAgo",
-        "comments7": "Comments7DaysAgo",
-        "shares7": "Shares7DaysAgo",
-        "rank7": "Rank7DaysAgo",
-        "followers14": "Followers14DaysAgo",
-        "likes14": "Likes14DaysAgo",
-        "views14": "Views14DaysAgo",
-        "comments14": "Comments14DaysAgo",
-        "shares14": "Shares14DaysAgo",
-        "rank14": "Rank14DaysAgo",
-        "followers28": "Followers28DaysAgo",
-        "likes28": "Likes28DaysAgo",
-        "views28": "Views28DaysAgo",
-        "comments28": "Comments28DaysAgo",
-        "shares28": "Shares28DaysAgo",
-        "rank28": "Rank28DaysAgo"
-    }
-
+async def get_tiktok_stats(pg_pool, page=1, per_page=30, sort_by="rank", cursor=None):
     user_sort_key = sort_by.lower()
 
-    order_sort_key = sorting.get(user_sort_key, "RankToday")
+    order_sort_key = TIKTOK_SORTING.get(user_sort_key, "RankToday")
 
     offset = (page - 1) * per_page
 
-    query = """
-    SELECT 
-        tiktok_stats.ID,
-        tiktok_stats.Username,
-        tiktok_stats.ImageURL,
-        
-        -- Today's data
-        convert_to_number(MAX(f1.FollowersCount)::text) AS FollowersToday,
-        convert_to_number(MAX(l1.LikesCount)::text) AS LikesToday,
-        convert_to_number(MAX(v1.ViewsCount)::text) AS ViewsToday,
-        convert_to_number(MAX(c1.CommentsCount)::text) AS CommentsToday,
-        convert_to_number(MAX(s1.SharesCount)::text) AS SharesToday,
-        MAX(r1.Position) AS RankToday,
-        
-        -- 7 days ago
-        convert_to_number(MAX(f7.FollowersCount)::text) AS Followers7DaysAgo,
-        convert_to_number(MAX(l7.LikesCount)::text) AS Likes7DaysAgo,
-        convert_to_number(MAX(v7.ViewsCount)::text) AS Views7DaysAgo,
-        convert_to_number(MAX(c7.CommentsCount)::text) AS Comments7DaysAgo,
-        convert_to_number(MAX(s7.SharesCount)::text) AS Shares7DaysAgo,
-        MAX(r7.Position) AS Rank7DaysAgo,
-        
-        -- 14 days ago
-        convert_to_number(MAX(f14.FollowersCount)::text) AS Followers14DaysAgo,
-        convert_to_number(MAX(l14.LikesCount)::text) AS Likes14DaysAgo,
-        convert_to_number(MAX(v14.ViewsCount)::text) AS Views14DaysAgo,
-        convert_to_number(MAX(c14.CommentsCount)::text) AS Comments14DaysAgo,
-        convert_to_number(MAX(s14.SharesCount)::text) AS Shares14DaysAgo,
-        MAX(r14.Position) AS Rank14DaysAgo,
-        
-        -- 28 days ago
-        convert_to_number(MAX(f28.FollowersCount)::text) AS Followers28DaysAgo,
-        convert_to_number(MAX(l28.LikesCount)::text) AS Likes28DaysAgo,
-        convert_to_number(MAX(v28.ViewsCount)::text) AS Views28DaysAgo,
-        convert_to_number(MAX(c28.CommentsCount)::text) AS Comments28DaysAgo,
-        convert_to_number(MAX(s28.SharesCount)::text) AS Shares28DaysAgo,
-        MAX(r28.Position) AS Rank28DaysAgo
-    FROM 
-        tiktok_stats
-    LEFT JOIN 
-        followers_tiktok f1 ON tiktok_stats.ID = f1.TikTokStatsID AND DATE(f1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        likes_history l1 ON tiktok_stats.ID = l1.TikTokStatsID AND DATE(l1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        views_history v1 ON tiktok_stats.ID = v1.TikTokStatsID AND DATE(v1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        comments_history c1 ON tiktok_stats.ID = c1.TikTokStatsID AND DATE(c1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        shares_history s1 ON tiktok_stats.ID = s1.TikTokStatsID AND DATE(s1.RecordedAt) = CURRENT_DATE
-    LEFT JOIN 
-        rank_tiktok r1 ON tiktok_stats.ID = r1.TikTokStatsID AND DATE(r1.RecordedAt) = CURRENT_DATE
-
-    -- 7 days ago joins
-    LEFT JOIN 
-        followers_tiktok f7 ON tiktok_stats.ID = f7.TikTokStatsID AND DATE(f7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        likes_history l7 ON tiktok_stats.ID = l7.TikTokStatsID AND DATE(l7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        views_history v7 ON tiktok_stats.ID = v7.TikTokStatsID AND DATE(v7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        comments_history c7 ON tiktok_stats.ID = c7.TikTokStatsID AND DATE(c7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        shares_history s7 ON tiktok_stats.ID = s7.TikTokStatsID AND DATE(s7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-    LEFT JOIN 
-        rank_tiktok r7 ON tiktok_stats.ID = r7.TikTokStatsID AND DATE(r7.RecordedAt) = CURRENT_DATE - INTERVAL '7 days'
-
-    -- 14 days ago joins
-    LEFT JOIN 
-        followers_tiktok f14 ON tiktok_stats.ID = f14.TikTokStatsID AND DATE(f14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    LEFT JOIN 
-        likes_history l14 ON tiktok_stats.ID = l14.TikTokStatsID AND DATE(l14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    LEFT JOIN 
-        views_history v14 ON tiktok_stats.ID = v14.TikTokStatsID AND DATE(v14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    LEFT JOIN 
-        comments_history c14 ON tiktok_stats.ID = c14.TikTokStatsID AND DATE(c14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    LEFT JOIN 
-        shares_history s14 ON tiktok_stats.ID = s14.TikTokStatsID AND DATE(s14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
-    LEFT JOIN 
-        rank_tiktok r14 ON tiktok_stats.ID = r14.TikTokStatsID AND DATE(r14.RecordedAt) = CURRENT_DATE - INTERVAL '14 days'
+    cursor_key = None
+    if cursor:
+        try:
+            cursor_key = decode_cursor(cursor)
+        except (ValueError, TypeError, binascii.Error):
+            return {
+                "status_code": 400,
+                "error": "Invalid cursor"
+            }
+    elif cursor is None and page < 1:
+        return {
+            "status_code": 400,
+            "error": "Invalid page"
+        }
 
-    -- 28 days ago joins
-    LEFT JOIN 
-        followers_tiktok f28 ON tiktok_stats.ID = f28.TikTokStatsID AND DATE(f28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    LEFT JOIN 
-        likes_history l28 ON tiktok_stats.ID = l28.TikTokStatsID AND DATE(l28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    LEFT JOIN 
-        views_history v28 ON tiktok_stats.ID = v28.TikTokStatsID AND DATE(v28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    LEFT JOIN 
-        comments_history c28 ON tiktok_stats.ID = c28.TikTokStatsID AND DATE(c28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    LEFT JOIN 
-        shares_history s28 ON tiktok_stats.ID = s28.TikTokStatsID AND DATE(s28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    LEFT JOIN 
-        rank_tiktok r28 ON tiktok_stats.ID = r28.TikTokStatsID AND DATE(r28.RecordedAt) = CURRENT_DATE - INTERVAL '28 days'
-    GROUP BY
-        tiktok_stats.ID, tiktok_stats.Username, tiktok_stats.ImageURL
+    query = TIKTOK_LEADERBOARD_SELECT + """
     ORDER BY
-        {} DESC
+        {} DESC, ID DESC
     LIMIT $1 OFFSET $2
     """.format(order_sort_key)
 
-    count_query = """
-    SELECT COUNT(*) FROM tiktok_stats
-    """
-
     try:
         async with pg_pool.acquire() as conn:
+            total_count = await fetch_total_count(conn, 'tiktok')
+
+            if cursor is not None:
+                results, next_cursor = await fetch_keyset_page(conn, TIKTOK_LEADERBOARD_SELECT, order_sort_key, per_page, cursor_key)
+                return {
+                    "status_code": 200,
+                    "data": format_tiktok_leaderboard(results),
+                    "pagination": {
+                        "per_page": per_page,
+                        "total_count": total_count,
+                        "total_pages": (total_count + per_page - 1) // per_page,
+                        "next_cursor": next_cursor
+                    }
+                }
+
             results = await conn.fetch(query, per_page, offset)
-            total_count = await conn.fetchval(count_query)
             
-            data = [dict(row) for row in results]
             total_pages = (total_count + per_page - 1) // per_page
 
-            json_data = abbreviate_numbers(data)
+            json_data = format_tiktok_leaderboard(results)
             
             return {
                 "status_code": 200,
@@ -594,76 +787,3 @@ async def get_tiktok_stats(pg_pool, page=1, per_page=30, sort_by="rank"):
             "status_code": 500,
             "error": str(e)
         }
-
-async def delete_old_insta_data(mysql_pool):
-    one_month_ago = datetime.utcnow() - timedelta(days=30)
-
-    delete_queries = [
-        "followers_insta",
-        "engagement_history",
-        "rank_insta"
-    ]
-
-    try:
-        async with mysql_pool.acquire() as conn:
-            async with conn.cursor() as cursor:
-                for table in delete_queries:
-                    # Delete old data
-                    delete_sql = f"""
-                    DELETE FROM {table}
-                    WHERE RecordedAt < %s;
-                    """
-                    await cursor.execute(delete_sql, (one_month_ago,))
-                    deleted_count = cursor.rowcount
-                    logging.info(f"Deleted {deleted_count} old records from {table}")
-
-                    # Reset the auto-increment
-                    reset_auto_increment_sql = f"""
-                    ALTER TABLE {table} AUTO_INCREMENT = 1;
-                    """
-                    await cursor.execute(reset_auto_increment_sql)
-                    logging.info(f"Reset auto-increment for {table}")
-
-                await conn.commit()
-
-        logging.info("Old Instagram data deletion and auto-increment reset completed successfully.")
-    except Exception as e:
-        logging.error(f"Failed to delete old Instagram data or reset auto-increments: {e}")
-
-async def delete_old_tiktok_data(pg_pool):
-    one_month_ago = datetime.utcnow() - timedelta(days=30)
-
-    delete_queries = [
-        ("comments_history", "CommentsCount"),
-        ("followers_tiktok", "FollowersCount"),
-        ("likes_history", "LikesCount"),
-        ("views_history", "ViewsCount"),
-        ("shares_history", "SharesCount"),
-        ("rank_tiktok", "Position")
-    ]
-
-    try:
-        async with pg_pool.acquire() as conn:
-            async with conn.transaction():
-                for table, count_column in delete_queries:
-                    # Delete old data
-                    delete_sql = f"""
-                    DELETE FROM {table}
-                    WHERE RecordedAt < $1;
-                    """
-                    result = await conn.execute(delete_sql, one_month_ago)
-                    deleted_count = int(result.split()[-1])
-                    logging.info(f"Deleted {deleted_count} old records from {table}")
-
-                    # Reset the sequence
-                    reset_sequence_sql = f"""
-                    SELECT setval(pg_get_serial_sequence('{table}', 'id'), 
-                                  COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, 
-                                  false);
-                    """
-                    await conn.execute(reset_sequence_sql)
-                    logging.info(f"Reset sequence for {table}")
-
-        logging.info("Old TikTok data deletion and sequence reset completed successfully.")
-    except Exception as e:
-        logging.error(f"Failed to delete old TikTok data or reset sequences: {e}")
\ No newline at end of file
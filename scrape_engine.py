@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import os
+import httpx
+from dotenv import load_dotenv
+from http_client import get_http_client, get_host_semaphore
+
+load_dotenv()
+
+# Point this at a local fixture server to scrape saved pages instead of hypeauditor.
+HYPEAUDITOR_BASE_URL = os.getenv('HYPEAUDITOR_BASE_URL', 'https://hypeauditor.com').rstrip('/')
+PER_HOST_CONCURRENCY = int(os.getenv('SCRAPE_PER_HOST_CONCURRENCY', 5))
+REQUEST_TIMEOUT = float(os.getenv('SCRAPE_REQUEST_TIMEOUT', 30))
+
+async def fetch_page(url):
+    # Shares the app's client (close_http_client closes it), pages get a longer timeout than API calls
+    async with get_host_semaphore(url, PER_HOST_CONCURRENCY):
+        return await get_http_client().get(url, timeout=REQUEST_TIMEOUT, follow_redirects=True)
+
+async def fetch_and_parse(index, url, parse):
+    try:
+        response = await fetch_page(url)
+    except httpx.HTTPError as e:
+        logging.error(f"Failed to fetch {url}: {e}")
+        return index, None
+
+    if response.status_code != 200:
+        logging.error(f"Failed to fetch {url}: HTTP {response.status_code}")
+        return index, None
+
+    # Parsing is CPU bound, keep it off the event loop
+    return index, await asyncio.to_thread(parse, response.text)
+
+async def scrape_pages(urls, parse):
+    """Fetch all urls concurrently and yield (index, rows) as each page is parsed.
+
+    Pages are yielded in completion order; rows is None for pages that failed.
+    """
+    tasks = [asyncio.ensure_future(fetch_and_parse(index, url, parse)) for index, url in enumerate(urls)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
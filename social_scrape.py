@@ -1,65 +1,43 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
 import os
 import json
-import pandas as pd
-import numpy as np
+from scrape_engine import HYPEAUDITOR_BASE_URL, scrape_pages
+from leaderboard_parser import parse_tiktok_page, parse_instagram_page, TIKTOK_HEADERS, INSTAGRAM_HEADERS
 
-async def tiktok_scrap():
-    try:
-        csv_file_name = 'scraped_data_tiktok.csv'
-        file_exists = os.path.isfile(csv_file_name)
-        if file_exists:
-            os.remove(csv_file_name)
-        scraped = False
-
-        for i in range(1, 20):
-            url = f'https://hypeauditor.com/top-tiktok-singapore/?p={i}'
-            response = requests.get(url)
-            if response.status_code == 200:
-                html_content = response.text
-                soup = BeautifulSoup(html_content, 'html.parser')
-                data = []
-                rows = soup.find_all('div', class_='row tiktok-row')
-                for row in rows:
-                    rank = row.find(class_='row-cell rank').get_text(strip=True) if row.find(class_='row-cell rank') else ''
-                    username = row.find(class_='contributor__name-content').get_text(strip=True) if row.find(class_='contributor__name-content') else ''
-                    comments = row.find(class_='row-cell comments-avg').get_text(strip=True) if row.find(class_='row-cell comments-avg') else ''
-                    followers = row.find(class_='row-cell subscribers').get_text(strip=True) if row.find(class_='row-cell subscribers') else ''
-                    views = row.find(class_='row-cell views-avg').get_text(strip=True) if row.find(class_='row-cell views-avg') else ''
-                    likes = row.find(class_='row-cell likes-avg').get_text(strip=True) if row.find(class_='row-cell likes-avg') else ''
-                    shares = row.find(class_='row-cell shares-avg').get_text(strip=True) if row.find(class_='row-cell shares-avg') else ''
-                    img = row.find('img')['src'] if row.find('img') else ''
-                    data.append([rank, username, comments, followers, likes, views, shares,img])
-                
-                with open(csv_file_name, 'a', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    if not file_exists:
-                        writer.writerow(['Rank', 'Username', 'Comments', 'Followers', 'Likes', 'Views', 'Shares', 'img'])
-                        file_exists = True 
-                    writer.writerows(data)
-                scraped = True
-            else:
-                scraped = False
-
-        file_name = 'scraped_data_tiktok.csv'
-        temp_file_name = file_name + '.tmp'
+def write_csv(csv_file_name, headers, pages):
+    temp_file_name = csv_file_name + '.tmp'
+    with open(temp_file_name, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(headers)
+        for index in sorted(pages):
+            writer.writerows(pages[index])
+    os.replace(temp_file_name, csv_file_name)
 
-        with open(file_name, mode='r', newline='', encoding='utf-8') as infile, \
-            open(temp_file_name, mode='w', newline='', encoding='utf-8') as outfile:
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
+async def scrape_leaderboard(urls, parse, headers, queue=None, csv_file_name=None):
+    # Parsed pages go straight onto the queue as they arrive, the CSV is only a side output
+    pages = {}
+    scraped = False
+    try:
+        async for index, data in scrape_pages(urls, parse):
+            if data is None:
+                continue
+            scraped = True
+            if queue is not None:
+                await queue.put([dict(zip(headers, values)) for values in data])
+            if csv_file_name:
+                pages[index] = data
+    finally:
+        if queue is not None:
+            await queue.put(None)
 
-            headers = ['Rank', 'Username', 'Comments', 'Followers', 'Likes', 'Views', 'Shares', 'img']
-            writer.writerow(headers)
-            
-            for row in reader:
-                if any(field.strip() for field in row):
-                    writer.writerow(row)
+    if csv_file_name and scraped:
+        write_csv(csv_file_name, headers, pages)
+    return scraped
 
-        os.remove(file_name)
-        os.rename(temp_file_name, file_name)
+async def tiktok_scrap(queue=None, csv_file_name=None):
+    try:
+        urls = [f'{HYPEAUDITOR_BASE_URL}/top-tiktok-singapore/?p={i}' for i in range(1, 20)]
+        scraped = await scrape_leaderboard(urls, parse_tiktok_page, TIKTOK_HEADERS, queue, csv_file_name)
         if scraped:
             return {
                 "status_code": 200,
@@ -77,59 +55,10 @@ async def tiktok_scrap():
         }
 
 
-async def instagram_scrap():
+async def instagram_scrap(queue=None, csv_file_name=None):
     try:
-        csv_file_name = 'scraped_data_instagram.csv'
-        file_exists = os.path.isfile(csv_file_name)
-        if file_exists:
-            os.remove(csv_file_name)
-        scraped = False
-
-        for i in range(1, 20):
-            url = f'https://hypeauditor.com/top-instagram-all-singapore/?p={i}'
-            response = requests.get(url)
-            if response.status_code == 200:
-                html_content = response.text
-                soup = BeautifulSoup(html_content, 'html.parser')
-                data = []
-                rows = soup.find_all('div', class_='row')
-                for row in rows:
-                    rank = row.find(class_='row-cell rank').get_text(strip=True) if row.find(class_='row-cell rank') else ''
-                    username = row.find(class_='contributor__name-content').get_text(strip=True) if row.find(class_='contributor__name-content') else ''
-                    category = row.find(class_='tag__content ellipsis').get_text(strip=True) if row.find(class_='tag__content ellipsis') else ''
-                    followers = row.find(class_='row-cell subscribers').get_text(strip=True) if row.find(class_='row-cell subscribers') else ''
-                    country = row.find(class_='row-cell audience').get_text(strip=True) if row.find(class_='row-cell audience') else ''
-                    engagement = row.find(class_='row-cell engagement').get_text(strip=True) if row.find(class_='row-cell engagement') else ''
-                    img = row.find('img')['src'] if row.find('img') else ''
-                    data.append([rank, username, category, followers, country, engagement, img])
-                
-                with open(csv_file_name, 'a', newline='', encoding='utf-8') as file:
-                    writer = csv.writer(file)
-                    if not file_exists:
-                        writer.writerow(['Rank', 'Username', 'Category', 'Followers', 'Country', 'Engagement', 'img'])
-                        file_exists = True  
-                    writer.writerows(data)
-                scraped = True
-            else:
-                scraped = False
-
-        file_name = 'scraped_data_instagram.csv'
-        temp_file_name = file_name + '.tmp'
-
-        with open(file_name, mode='r', newline='', encoding='utf-8') as infile, \
-            open(temp_file_name, mode='w', newline='', encoding='utf-8') as outfile:
-            reader = csv.reader(infile)
-            writer = csv.writer(outfile)
-
-            headers = ['Rank', 'Username', 'Category', 'Followers', 'Country', 'Engagement', 'img']
-            writer.writerow(headers)
-            
-            for row in reader:
-                if any(field.strip() for field in row):
-                    writer.writerow(row)
-
-        os.remove(file_name)
-        os.rename(temp_file_name, file_name)
+        urls = [f'{HYPEAUDITOR_BASE_URL}/top-instagram-all-singapore/?p={i}' for i in range(1, 20)]
+        scraped = await scrape_leaderboard(urls, parse_instagram_page, INSTAGRAM_HEADERS, queue, csv_file_name)
         if scraped:
             return {
                 "status_code": 200,
@@ -147,6 +76,8 @@ async def instagram_scrap():
         }
             
 async def csv_to_json(filename):
+    import numpy as np
+    import pandas as pd
     df = pd.read_csv(filename)
     
     # Replace non-compliant float values
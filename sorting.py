@@ -0,0 +1,43 @@
+# Rank page sort keys -> leaderboard_daily columns, shared by the schema, the
+# SQL queries and the Redis sorted sets
+INSTA_SORTING = {
+    "followers": "FollowersToday",
+    "engagement": "EngagementToday",
+    "rank": "RankToday",
+    "followers7": "Followers7DaysAgo",
+    "engagement7": "Engagement7DaysAgo",
+    "rank7": "Rank7DaysAgo",
+    "followers14": "Followers14DaysAgo",
+    "engagement14": "Engagement14DaysAgo",
+    "rank14": "Rank14DaysAgo",
+    "followers28": "Followers28DaysAgo",
+    "engagement28": "Engagement28DaysAgo",
+    "rank28": "Rank28DaysAgo"
+}
+
+TIKTOK_SORTING = {
+    "followers": "FollowersToday",
+    "likes": "LikesToday",
+    "views": "ViewsToday",
+    "comments": "CommentsToday",
+    "shares": "SharesToday",
+    "rank": "RankToday",
+    "followers7": "Followers7DaysAgo",
+    "likes7": "Likes7DaysAgo",
+    "views7": "Views7DaysAgo",
+    "comments7": "Comments7DaysAgo",
+    "shares7": "Shares7DaysAgo",
+    "rank7": "Rank7DaysAgo",
+    "followers14": "Followers14DaysAgo",
+    "likes14": "Likes14DaysAgo",
+    "views14": "Views14DaysAgo",
+    "comments14": "Comments14DaysAgo",
+    "shares14": "Shares14DaysAgo",
+    "rank14": "Rank14DaysAgo",
+    "followers28": "Followers28DaysAgo",
+    "likes28": "Likes28DaysAgo",
+    "views28": "Views28DaysAgo",
+    "comments28": "Comments28DaysAgo",
+    "shares28": "Shares28DaysAgo",
+    "rank28": "Rank28DaysAgo"
+}
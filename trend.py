@@ -1,6 +1,6 @@
-import requests
 import os
 from dotenv import load_dotenv
+from http_client import api_get
 
 load_dotenv()
 
@@ -12,7 +12,7 @@ async def get_trend_1():
             "x-rapidapi-host": "twitter-trends-by-location.p.rapidapi.com"
         }
 
-        response = requests.get(url, headers=headers)
+        response = await api_get(url, headers=headers)
         return {
             "status_code": response.status_code,
             "data": response.json()
@@ -0,0 +1,85 @@
+"""Batch worker: runs the scheduled scrape/image jobs outside the API process.
+
+    python worker.py
+
+Jobs run on their cron schedule from jobs.JOBS, or right away when the API
+pushes their name onto the jobs-trigger list (POST /jobs/{name}). Any number
+of workers can run: only the one holding the leader lease fires the cron jobs,
+and every run holds a per-job lease so the same job never runs twice at once.
+"""
+import asyncio
+import logging
+import signal
+import aioredis
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from database import REDIS_URL, get_redis, get_mysql_pool
+from http_client import close_http_client
+from jobs import JOBS, JOB_TRIGGER_KEY, run_job, hold_leadership
+
+TRIGGER_RETRY_SECONDS = 5
+
+async def listen_for_triggers(redis, running):
+    while True:
+        conn = None
+        try:
+            # BLPOP parks its connection, so it gets one of its own instead of the shared pool
+            conn = await aioredis.create_redis(REDIS_URL)
+            while True:
+                _, name = await conn.blpop(JOB_TRIGGER_KEY, timeout=0, encoding='utf-8')
+                if name not in JOBS:
+                    logging.warning(f"Ignoring trigger for unknown job {name}")
+                    continue
+                logging.info(f"Running triggered job {name}")
+                task = asyncio.create_task(run_job(redis, name))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        except Exception as e:
+            logging.warning(f"Job trigger listener failed, reconnecting: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+                await conn.wait_closed()
+        await asyncio.sleep(TRIGGER_RETRY_SECONDS)
+
+async def run_scheduled_job(redis, name, leader):
+    if not leader.is_set():
+        return
+    await run_job(redis, name)
+
+async def main():
+    redis = await get_redis()
+    mysql_pool = await get_mysql_pool()
+
+    leader = asyncio.Event()
+    scheduler = AsyncIOScheduler()
+    for name, job in JOBS.items():
+        scheduler.add_job(run_scheduled_job, 'cron', args=[redis, name, leader], id=name, **job["cron"])
+    scheduler.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    running = set()
+    listener = asyncio.create_task(listen_for_triggers(redis, running))
+    leadership = asyncio.create_task(hold_leadership(redis, leader))
+    logging.info("Worker started.")
+    try:
+        await stop.wait()
+    finally:
+        logging.info("Worker stopping.")
+        scheduler.shutdown(wait=False)
+        listener.cancel()
+        leadership.cancel()
+        for task in running:
+            task.cancel()
+        await asyncio.gather(listener, leadership, *running, return_exceptions=True)
+        redis.close()
+        await redis.wait_closed()
+        await mysql_pool.close()
+        await close_http_client()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())